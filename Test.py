@@ -1,11 +1,66 @@
-# pip install azure-storage-blob
+# pip install azure-storage-blob aiohttp  (aiohttp is only needed by "sync")
 
 
+import argparse
+import asyncio
+import hashlib
+import json
 import os
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
-from azure.core.exceptions import ResourceNotFoundError, HttpResponseError
-import tkinter as tk
-from tkinter import filedialog
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from azure.storage.blob import (
+    BlobServiceClient,
+    BlobClient,
+    ContainerClient,
+    BlobBlock,
+    BlobPrefix,
+    ContentSettings,
+)
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceNotFoundError,
+    ResourceModifiedError,
+    HttpResponseError,
+)
+
+
+# Transfers are split into blocks of BLOB_BLOCK_SIZE bytes, with up to
+# BLOB_MAX_CONCURRENCY of them in flight, so memory use stays around
+# concurrency x block size whatever the file size.
+MAX_CONCURRENCY = int(os.environ.get("BLOB_MAX_CONCURRENCY", "4"))
+BLOCK_SIZE = int(os.environ.get("BLOB_BLOCK_SIZE", str(8 * 1024 * 1024)))
+# A block blob holds at most 50,000 blocks
+MAX_BLOCKS = 50000
+# Transfers in flight during a sync, and blobs per batch delete request
+# (the service limit is 256)
+SYNC_CONCURRENCY = int(os.environ.get("BLOB_SYNC_CONCURRENCY", "64"))
+DELETE_BATCH_SIZE = 256
+# Listing pages are cached locally and re-fetched once older than the TTL
+LIST_PAGE_SIZE = int(os.environ.get("BLOB_LIST_PAGE_SIZE", "100"))
+LIST_CACHE_TTL = float(os.environ.get("BLOB_LIST_CACHE_TTL", "300"))
+LIST_CACHE_PATH = os.environ.get(
+    "BLOB_LIST_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "blobtool", "listing.sqlite3"),
+)
+
+
+def create_blob_service_client(account_name=None, account_key=None, connection_string=None):
+    # A connection string also covers Azurite ("UseDevelopmentStorage=true")
+    options = dict(
+        max_block_size=BLOCK_SIZE,
+        max_single_put_size=BLOCK_SIZE,
+        max_chunk_get_size=BLOCK_SIZE,
+        max_single_get_size=BLOCK_SIZE,
+    )
+    if connection_string:
+        return BlobServiceClient.from_connection_string(connection_string, **options)
+    return BlobServiceClient(
+        account_url=f"https://{account_name}.blob.core.windows.net",
+        credential=account_key,
+        **options,
+    )
 
 
 def create_container_if_not_exists(blob_service_client, container_name):
@@ -20,41 +75,331 @@ def create_container_if_not_exists(blob_service_client, container_name):
         print(f"Failed to create or check container: {e}")
 
 
-def upload_blob(blob_service_client, container_name, local_file_path, blob_name):
+def _block_ids(local_file_path, block_count, block_size):
+    # IDs are tied to this version of the file, so a resumed upload never
+    # commits blocks staged from an older copy
+    stat = os.stat(local_file_path)
+    version = hashlib.sha1(
+        f"{stat.st_size}:{stat.st_mtime_ns}:{block_size}".encode()
+    ).hexdigest()[:16]
+    return [f"{version}-{index:08d}" for index in range(block_count)]
+
+
+def _staged_blocks(blob_client):
+    # Blocks staged by an interrupted upload stay on the service, uncommitted,
+    # for up to a week
+    try:
+        _, uncommitted = blob_client.get_block_list("uncommitted")
+    except ResourceNotFoundError:
+        return {}
+    return {block.id: block.size for block in uncommitted}
+
+
+def _upload_blocks(blob_client, local_file_path, max_concurrency, block_size, overwrite):
+    size = os.path.getsize(local_file_path)
+    block_size = max(block_size, -(-size // MAX_BLOCKS))
+    block_count = -(-size // block_size)
+    block_ids = _block_ids(local_file_path, block_count, block_size)
+    staged = _staged_blocks(blob_client)
+
+    def stage(index):
+        offset = index * block_size
+        length = min(block_size, size - offset)
+        if staged.get(block_ids[index]) == length:
+            return False
+        with open(local_file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        blob_client.stage_block(block_ids[index], data, length=length)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        uploaded = sum(executor.map(stage, range(block_count)))
+    if uploaded < block_count:
+        print(f"Resumed upload: {block_count - uploaded} of {block_count} blocks were already staged.")
+
+    conditions = {} if overwrite else dict(etag="*", match_condition=MatchConditions.IfMissing)
+    blob_client.commit_block_list(
+        [BlobBlock(block_id=block_id) for block_id in block_ids], **conditions
+    )
+
+
+def upload_blob(
+    blob_service_client,
+    container_name,
+    local_file_path,
+    blob_name,
+    max_concurrency=MAX_CONCURRENCY,
+    block_size=BLOCK_SIZE,
+    overwrite=False,
+):
     try:
         blob_client = blob_service_client.get_blob_client(
             container=container_name, blob=blob_name
         )
-        with open(local_file_path, "rb") as data:
-            blob_client.upload_blob(data)
+        if os.path.getsize(local_file_path) <= block_size:
+            with open(local_file_path, "rb") as data:
+                blob_client.upload_blob(data, overwrite=overwrite)
+        else:
+            _upload_blocks(blob_client, local_file_path, max_concurrency, block_size, overwrite)
         print(
             f"File {local_file_path} uploaded to {blob_name} in container {container_name}."
         )
     except Exception as e:
         print(f"Failed to upload file: {e}")
+        return
+    invalidate_listing(blob_service_client.account_name, container_name, blob_name)
 
 
-def list_blobs(blob_service_client, container_name):
+class ListingCache:
+    # One row per listing page, keyed by account, container, prefix,
+    # delimiter, page size and the continuation token that page starts at.
+    # Pages are refreshed one at a time as they are viewed, and the tool
+    # drops the pages covering a blob whenever it uploads or deletes that blob.
+    def __init__(self, path=LIST_CACHE_PATH, ttl=LIST_CACHE_TTL):
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+        if columns and "page_size" not in columns:
+            # Written before pages were keyed by size; it's only a cache
+            self.conn.execute("DROP TABLE pages")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                account TEXT, container TEXT, prefix TEXT, delimiter TEXT, page_size INTEGER,
+                token TEXT, entries TEXT NOT NULL, next_token TEXT, fetched_at REAL NOT NULL,
+                PRIMARY KEY (account, container, prefix, delimiter, page_size, token)
+            )"""
+        )
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT entries, next_token, fetched_at FROM pages WHERE account = ? AND container = ? "
+            "AND prefix = ? AND delimiter = ? AND page_size = ? AND token = ?",
+            key,
+        ).fetchone()
+        if row is None or time.time() - row[2] > self.ttl:
+            return None
+        return [tuple(entry) for entry in json.loads(row[0])], row[1]
+
+    def put(self, key, entries, next_token):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (*key, json.dumps(entries), next_token, time.time()),
+        )
+
+    def invalidate(self, account, container, blob_name="", subtree=False):
+        # Every listing whose prefix covers blob_name may now be out of date;
+        # with subtree, so is every listing below it
+        self.conn.execute(
+            "DELETE FROM pages WHERE account = ? AND container = ? "
+            "AND (substr(?, 1, length(prefix)) = prefix "
+            "OR (? AND substr(prefix, 1, length(?)) = ?))",
+            (account, container, blob_name, subtree, blob_name, blob_name),
+        )
+
+
+_listing_cache = None
+
+
+def get_listing_cache():
+    # BLOB_LIST_CACHE=off disables the cache
+    global _listing_cache
+    if LIST_CACHE_PATH.lower() in ("", "0", "off", "none"):
+        return None
+    if _listing_cache is None:
+        _listing_cache = ListingCache()
+    return _listing_cache
+
+
+def invalidate_listing(account, container_name, blob_name="", subtree=False):
+    # Called after the change has been made, so a cache failure is only
+    # reported; listings may then be stale for up to BLOB_LIST_CACHE_TTL
+    try:
+        cache = get_listing_cache()
+        if cache is not None:
+            cache.invalidate(account, container_name, blob_name, subtree)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Could not update the listing cache, listings may be out of date: {e}")
+
+
+def list_blobs(
+    blob_service_client,
+    container_name,
+    prefix="",
+    delimiter="/",
+    continuation_token=None,
+    page_size=LIST_PAGE_SIZE,
+    refresh=False,
+):
+    # Returns one page as ([(name, is_folder, size), ...], next_token); pass
+    # next_token back in for the following page, None means it was the last.
+    # With a delimiter, names below the next "/" are folded into a folder
+    # entry, so a page never has to walk the whole container.
+    cache = get_listing_cache()
+    key = (
+        blob_service_client.account_name,
+        container_name,
+        prefix,
+        delimiter or "",
+        page_size,
+        continuation_token or "",
+    )
+    if cache is not None and not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
     try:
         container_client = blob_service_client.get_container_client(container_name)
-        blobs = container_client.list_blobs()
-        blob_list = [blob.name for blob in blobs]
-        return blob_list
+        if delimiter:
+            items = container_client.walk_blobs(
+                name_starts_with=prefix or None, delimiter=delimiter, results_per_page=page_size
+            )
+        else:
+            items = container_client.list_blobs(
+                name_starts_with=prefix or None, results_per_page=page_size
+            )
+        pages = items.by_page(continuation_token=continuation_token)
+        entries = [
+            (item.name, isinstance(item, BlobPrefix), getattr(item, "size", None))
+            for item in next(pages, [])
+        ]
+        next_token = pages.continuation_token or None
     except Exception as e:
         print(f"Failed to list blobs: {e}")
-        return []
+        return [], None
+    if cache is not None:
+        cache.put(key, entries, next_token)
+    return entries, next_token
+
+
+def get_blob_info(blob_service_client, container_name, blob_name):
+    # Looks a single blob up by name (one HEAD request, no listing)
+    try:
+        properties = blob_service_client.get_blob_client(
+            container=container_name, blob=blob_name
+        ).get_blob_properties()
+        return properties.name, properties.size, properties.last_modified
+    except ResourceNotFoundError:
+        return None
+
+
+def choose_blob(blob_service_client, container_name):
+    # Interactive, page-by-page browser over virtual folders; returns the
+    # selected blob name or None
+    prefix, tokens, refresh = "", [None], False
+    while True:
+        entries, next_token = list_blobs(
+            blob_service_client, container_name, prefix, continuation_token=tokens[-1], refresh=refresh
+        )
+        refresh = False
+        if not entries and not prefix and len(tokens) == 1:
+            print("No blobs found in the container.")
+            return None
+        print(f"Blobs in {container_name}/{prefix} (page {len(tokens)}):")
+        for i, (name, is_folder, size) in enumerate(entries, 1):
+            print(f"{i}. {name}" + ("" if is_folder else f" ({size} bytes)"))
+        choice = input(
+            "Number to select, 'n' next page, 'p' previous, 'u' up a folder, "
+            "'r' refresh, '=name' exact name, or blank to cancel: "
+        ).strip()
+        if not choice:
+            return None
+        if choice == "n" and next_token:
+            tokens.append(next_token)
+        elif choice == "p" and len(tokens) > 1:
+            tokens.pop()
+        elif choice == "u" and prefix:
+            prefix = prefix[: prefix.rstrip("/").rfind("/") + 1]
+            tokens = [None]
+        elif choice == "r":
+            refresh = True
+        elif choice.startswith("="):
+            info = get_blob_info(blob_service_client, container_name, choice[1:])
+            if info:
+                return info[0]
+            print(f"The blob {choice[1:]} does not exist.")
+        elif choice.isdigit() and 1 <= int(choice) <= len(entries):
+            name, is_folder, _ = entries[int(choice) - 1]
+            if not is_folder:
+                return name
+            prefix, tokens = name, [None]
+        else:
+            print("Invalid choice.")
 
 
-def download_blob(blob_service_client, container_name, blob_name, download_file_path):
+def _resume_offset(partial_path, state_path, properties):
+    # Bytes of a previous attempt that can be kept: only if the blob is still
+    # the same version (etag) and the partial file holds everything recorded
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if state.get("etag") != properties.etag or state.get("size") != properties.size:
+        return 0
+    if not os.path.exists(partial_path) or os.path.getsize(partial_path) < state["offset"]:
+        return 0
+    return state["offset"]
+
+
+def _discard_partial(partial_path, state_path):
+    for path in (partial_path, state_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def download_blob(
+    blob_service_client,
+    container_name,
+    blob_name,
+    download_file_path,
+    max_concurrency=MAX_CONCURRENCY,
+    block_size=BLOCK_SIZE,
+):
+    # Streams ranged, parallel reads into "<path>.partial", recording progress
+    # in "<path>.partial.json" after every segment, and renames the file into
+    # place when complete. Running it again after a failure resumes from the
+    # last finished segment.
+    partial_path = download_file_path + ".partial"
+    state_path = partial_path + ".json"
     try:
         blob_client = blob_service_client.get_blob_client(
             container=container_name, blob=blob_name
         )
-        with open(download_file_path, "wb") as download_file:
-            download_file.write(blob_client.download_blob().readall())
+        properties = blob_client.get_blob_properties()
+        offset = _resume_offset(partial_path, state_path, properties)
+        if offset:
+            print(f"Resuming download of {blob_name} at byte {offset} of {properties.size}.")
+        segment = block_size * max_concurrency
+        with open(partial_path, "r+b" if offset else "wb") as download_file:
+            download_file.truncate(offset)
+            while offset < properties.size:
+                length = min(segment, properties.size - offset)
+                download_file.seek(offset)
+                blob_client.download_blob(
+                    offset=offset,
+                    length=length,
+                    max_concurrency=max_concurrency,
+                    etag=properties.etag,
+                    match_condition=MatchConditions.IfNotModified,
+                ).readinto(download_file)
+                download_file.flush()
+                os.fsync(download_file.fileno())
+                offset += length
+                with open(state_path, "w") as f:
+                    json.dump(
+                        {"etag": properties.etag, "size": properties.size, "offset": offset}, f
+                    )
+        os.replace(partial_path, download_file_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
         print(f"File {blob_name} downloaded to {download_file_path}.")
     except ResourceNotFoundError:
         print(f"The blob {blob_name} does not exist.")
+    except ResourceModifiedError:
+        _discard_partial(partial_path, state_path)
+        print(f"The blob {blob_name} changed during the download; run it again to start over.")
     except Exception as e:
         print(f"Failed to download blob: {e}")
 
@@ -67,20 +412,230 @@ def delete_blob(blob_service_client, container_name, blob_name):
         blob_client.delete_blob()
         print(f"Blob {blob_name} deleted from container {container_name}.")
     except ResourceNotFoundError:
+        # A cached listing may still show it
         print(f"The blob {blob_name} does not exist.")
     except Exception as e:
         print(f"Failed to delete blob: {e}")
+        return
+    invalidate_listing(blob_service_client.account_name, container_name, blob_name)
+
+
+def file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(chunk)
+    return md5.digest()
+
+
+def _local_files(local_dir):
+    # blob-style relative name -> (path, size, mtime_ns)
+    files = {}
+    for dirpath, _, filenames in os.walk(local_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if filename.endswith((".partial", ".partial.json")):
+                continue
+            stat = os.stat(path)
+            name = os.path.relpath(path, local_dir).replace(os.sep, "/")
+            files[name] = (path, stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _local_path(local_dir, name):
+    # Blob names are untrusted: "../x" or a symlinked folder must not lead a
+    # pull outside local_dir
+    root = os.path.realpath(local_dir)
+    path = os.path.realpath(os.path.join(root, *name.split("/")))
+    if path == root or os.path.commonpath([root, path]) != root:
+        raise ValueError(f"blob name escapes {local_dir}")
+    return path
+
+
+async def _remote_blobs(container_client, prefix):
+    # blob name relative to prefix -> (size, mtime_ns from metadata, md5)
+    blobs = {}
+    async for blob in container_client.list_blobs(name_starts_with=prefix or None, include=["metadata"]):
+        mtime = (blob.metadata or {}).get("mtime")
+        blobs[blob.name[len(prefix):]] = (
+            blob.size,
+            int(mtime) if mtime and mtime.isdigit() else None,
+            bytes(blob.content_settings.content_md5 or b""),
+        )
+    return blobs
+
+
+async def _unchanged(path, size, mtime_ns, remote):
+    # Size and the mtime recorded at upload decide without reading the file;
+    # otherwise fall back to comparing MD5s
+    remote_size, remote_mtime, remote_md5 = remote
+    if size != remote_size:
+        return False
+    if mtime_ns == remote_mtime:
+        return True
+    return bool(remote_md5) and await asyncio.to_thread(file_md5, path) == remote_md5
+
+
+async def _push_file(container_client, blob_name, path, mtime_ns):
+    md5 = await asyncio.to_thread(file_md5, path)
+    with open(path, "rb") as data:
+        await container_client.upload_blob(
+            blob_name,
+            data,
+            overwrite=True,
+            metadata={"mtime": str(mtime_ns)},
+            content_settings=ContentSettings(content_md5=bytearray(md5)),
+            max_concurrency=MAX_CONCURRENCY,
+        )
+
+
+async def _pull_file(container_client, blob_name, path, mtime_ns):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = path + ".partial"
+    downloader = await container_client.download_blob(blob_name, max_concurrency=MAX_CONCURRENCY)
+    with open(partial_path, "wb") as f:
+        await downloader.readinto(f)
+    os.replace(partial_path, path)
+    if mtime_ns is not None:
+        # Keeps the next comparison down to a stat()
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+async def _delete_remote(container_client, blob_names):
+    for start in range(0, len(blob_names), DELETE_BATCH_SIZE):
+        await container_client.delete_blobs(*blob_names[start : start + DELETE_BATCH_SIZE])
+
+
+async def sync_directory(
+    container_client,
+    direction,
+    local_dir,
+    prefix="",
+    delete=False,
+    dry_run=False,
+    concurrency=SYNC_CONCURRENCY,
+):
+    # direction is "push" (local -> container) or "pull" (container -> local).
+    # Returns counts of transferred, unchanged, deleted and failed files.
+    local = _local_files(local_dir) if os.path.isdir(local_dir) else {}
+    remote = await _remote_blobs(container_client, prefix)
+    source, target = (local, remote) if direction == "push" else (remote, local)
+    summary = {"transferred": 0, "unchanged": 0, "deleted": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transfer(name):
+        async with semaphore:
+            try:
+                if direction == "push":
+                    path, size, mtime_ns = local[name]
+                    if name in remote and await _unchanged(path, size, mtime_ns, remote[name]):
+                        summary["unchanged"] += 1
+                        return
+                    if not dry_run:
+                        await _push_file(container_client, prefix + name, path, mtime_ns)
+                else:
+                    path = _local_path(local_dir, name)
+                    if name in local and await _unchanged(path, local[name][1], local[name][2], remote[name]):
+                        summary["unchanged"] += 1
+                        return
+                    if not dry_run:
+                        await _pull_file(container_client, prefix + name, path, remote[name][1])
+                summary["transferred"] += 1
+                print(f"{'Would copy' if dry_run else 'Copied'} {name}")
+            except Exception as e:
+                summary["failed"] += 1
+                print(f"Failed to sync {name}: {e}")
+
+    await asyncio.gather(*(transfer(name) for name in source))
+
+    if delete:
+        extra = sorted(set(target) - set(source))
+        for name in extra:
+            print(f"{'Would delete' if dry_run else 'Deleting'} {name}")
+        if extra and not dry_run:
+            try:
+                if direction == "push":
+                    await _delete_remote(container_client, [prefix + name for name in extra])
+                else:
+                    for name in extra:
+                        os.remove(local[name][0])
+                summary["deleted"] = len(extra)
+            except Exception as e:
+                summary["failed"] += len(extra)
+                print(f"Failed to delete: {e}")
+    return summary
+
+
+def create_async_container_client(container_name):
+    # Headless credentials: AZURE_STORAGE_CONNECTION_STRING, or
+    # AZURE_STORAGE_ACCOUNT and AZURE_STORAGE_KEY
+    from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+
+    options = dict(max_block_size=BLOCK_SIZE, max_single_put_size=BLOCK_SIZE)
+    connection_string = os.environ.get("AZURE_STORAGE_CONNECTION_STRING")
+    if connection_string:
+        service = AsyncBlobServiceClient.from_connection_string(connection_string, **options)
+    else:
+        service = AsyncBlobServiceClient(
+            account_url=f"https://{os.environ['AZURE_STORAGE_ACCOUNT']}.blob.core.windows.net",
+            credential=os.environ["AZURE_STORAGE_KEY"],
+            **options,
+        )
+    return service.get_container_client(container_name)
+
+
+async def run_sync(args):
+    async with create_async_container_client(args.container) as container_client:
+        if args.direction == "push" and not await container_client.exists():
+            await container_client.create_container()
+        summary = await sync_directory(
+            container_client,
+            args.direction,
+            args.local_dir,
+            args.prefix,
+            args.delete,
+            args.dry_run,
+            args.concurrency,
+        )
+        if args.direction == "push" and not args.dry_run:
+            invalidate_listing(container_client.account_name, args.container, args.prefix, subtree=True)
+    print(
+        f"{summary['transferred']} copied, {summary['unchanged']} unchanged, "
+        f"{summary['deleted']} deleted, {summary['failed']} failed."
+    )
+    return 1 if summary["failed"] else 0
+
+
+def sync_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="Test.py sync", description="Mirror a local directory to a container or back"
+    )
+    parser.add_argument("direction", choices=["push", "pull"])
+    parser.add_argument("local_dir")
+    parser.add_argument("container")
+    parser.add_argument("--prefix", default="", help="blob name prefix (virtual folder)")
+    parser.add_argument("--delete", action="store_true", help="remove files missing from the source")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=SYNC_CONCURRENCY)
+    args = parser.parse_args(argv)
+    if args.prefix and not args.prefix.endswith("/"):
+        args.prefix += "/"
+    return asyncio.run(run_sync(args))
 
 
 def main():
-    azure_storage_name = input("Storage Account Name: ")
-    azure_storage_key = input("Storage Account Key: ")
+    # e.g. AZURE_STORAGE_CONNECTION_STRING=UseDevelopmentStorage=true for Azurite
+    connection_string = os.environ.get("AZURE_STORAGE_CONNECTION_STRING")
+    if connection_string:
+        azure_storage_name = azure_storage_key = None
+    else:
+        azure_storage_name = input("Storage Account Name: ")
+        azure_storage_key = input("Storage Account Key: ")
     container_name = input("Container Name (e.g. uploads): ")
 
     try:
-        blob_service_client = BlobServiceClient(
-            account_url=f"https://{azure_storage_name}.blob.core.windows.net",
-            credential=azure_storage_key,
+        blob_service_client = create_blob_service_client(
+            azure_storage_name, azure_storage_key, connection_string
         )
     except Exception as e:
         print(f"Failed to create BlobServiceClient: {e}")
@@ -88,6 +643,10 @@ def main():
 
     create_container_if_not_exists(blob_service_client, container_name)
 
+    # Only the interactive menu needs Tk; sync runs headless
+    import tkinter as tk
+    from tkinter import filedialog
+
     # Initialize Tkinter root (hidden)
     root = tk.Tk()
     root.withdraw()
@@ -107,39 +666,26 @@ def main():
             blob_name = os.path.basename(local_file_path)
             upload_blob(blob_service_client, container_name, local_file_path, blob_name)
         elif option == "2":
-            blobs = list_blobs(blob_service_client, container_name)
-            if blobs:
-                print("Blobs in container:")
-                for i, blob in enumerate(blobs, 1):
-                    print(f"{i}. {blob}")
-                blob_choice = (
-                    int(input("Enter the number of the blob to download or delete: "))
-                    - 1
-                )
-                if 0 <= blob_choice < len(blobs):
-                    blob_name = blobs[blob_choice]
-                    print("Options:")
-                    print("1. Download")
-                    print("2. Delete")
-                    action = input("Enter your choice: ")
-                    if action == "1":
-                        download_file_path = input(
-                            "Enter the local path to download the file to: "
-                        )
-                        download_blob(
-                            blob_service_client,
-                            container_name,
-                            blob_name,
-                            download_file_path,
-                        )
-                    elif action == "2":
-                        delete_blob(blob_service_client, container_name, blob_name)
-                    else:
-                        print("Invalid choice.")
+            blob_name = choose_blob(blob_service_client, container_name)
+            if blob_name:
+                print("Options:")
+                print("1. Download")
+                print("2. Delete")
+                action = input("Enter your choice: ")
+                if action == "1":
+                    download_file_path = input(
+                        "Enter the local path to download the file to: "
+                    )
+                    download_blob(
+                        blob_service_client,
+                        container_name,
+                        blob_name,
+                        download_file_path,
+                    )
+                elif action == "2":
+                    delete_blob(blob_service_client, container_name, blob_name)
                 else:
-                    print("Invalid blob number.")
-            else:
-                print("No blobs found in the container.")
+                    print("Invalid choice.")
         elif option == "3":
             print("Exiting...")
             break
@@ -148,4 +694,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # python Test.py sync push|pull LOCAL_DIR CONTAINER [--prefix P] [--delete]
+    if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        sys.exit(sync_main(sys.argv[2:]))
     main()
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .bignum import evaluate
+from .database import AsyncSessionLocal, get_async_db
+from .evaluator import preprocess_expression
+from .history import (
+    HISTORY_MAX_PAGE_SIZE,
+    HISTORY_PAGE_SIZE,
+    HISTORY_STREAM_BATCH,
+    decode_cursor,
+    encode_cursor,
+    history_query,
+    to_ndjson,
+)
+from .metrics import phase, timed_handler
+from .rollups import STATS_TOP_EXPRESSIONS, history_stats, rollup_buffer
+from .writebehind import WriteBehindUnavailable, write_behind
+
+# Same endpoints as main.py, served from the event loop on the async engine
+# so a waiting database round trip doesn't hold a threadpool worker.
+router = APIRouter(prefix="/async")
+
+@router.post("/calculate", response_model=schemas.CalculationResponse)
+@timed_handler
+async def calculate_expression(
+    calculation: schemas.CalculationCreate, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        processed_expression = preprocess_expression(calculation.expression)
+        # A budgeted evaluation may take up to BIGNUM_MAX_SECONDS of CPU, which
+        # must not stall the event loop
+        result_str, cost = await run_in_threadpool(
+            evaluate, processed_expression, calculation.mode, calculation.precision
+        )
+
+        if write_behind is not None:
+            with phase("enqueue"):
+                row = write_behind.enqueue(calculation.expression, result_str)
+            return {**row, "cost": cost}
+
+        timestamp = datetime.now(timezone.utc)
+        db_calculation = models.Calculation(
+            expression=calculation.expression, result=result_str, timestamp=timestamp
+        )
+        with phase("insert"):
+            db.add(db_calculation)
+            await db.flush()
+        with phase("commit"):
+            await db.commit()
+        # Counted once committed; rollup_buffer writes the rollup rows
+        rollup_buffer.add([(timestamp, processed_expression)])
+        with phase("refresh"):
+            await db.refresh(db_calculation)
+        db_calculation.cost = cost
+        return db_calculation
+    except WriteBehindUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+
+async def stream_history(cursor=None, limit=None):
+    async with AsyncSessionLocal() as db:
+        query = history_query(cursor, limit).execution_options(yield_per=HISTORY_STREAM_BATCH)
+        result = await db.stream_scalars(query)
+        async for calculation in result:
+            yield to_ndjson(calculation)
+
+@router.get("/history", response_model=list[schemas.CalculationResponse])
+@timed_handler
+async def get_calculation_history(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        if cursor is not None:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_history(cursor, limit), media_type="application/x-ndjson"
+        )
+
+    limit = min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)
+    with phase("query"):
+        history = (await db.scalars(history_query(cursor, limit))).all()
+    if len(history) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(history[-1])
+    return history
+
+@router.get("/history/stats", response_model=schemas.HistoryStatsResponse)
+@timed_handler
+async def get_history_stats(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Literal["minute", "hour", "day"] = "minute",
+    top: int = Query(STATS_TOP_EXPRESSIONS, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        with phase("query"):
+            return await db.run_sync(history_stats, start, end, bucket, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
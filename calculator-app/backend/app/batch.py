@@ -0,0 +1,108 @@
+import ast
+import os
+
+import numpy as np
+
+from .evaluator import (
+    ALLOWED_CONSTANTS,
+    ALLOWED_FUNCTIONS,
+    NESTED_TOO_DEEPLY,
+    compile_expression,
+    preprocess_expression,
+    safe_eval,
+)
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+def _unary(ufunc):
+    # NumPy ufuncs take an `out` array as their second positional argument,
+    # so pin them to one argument like their math counterparts.
+    return lambda value: ufunc(value)
+
+def _vector_log(value, base=None):
+    if base is None:
+        return np.log(value)
+    return np.log(value) / np.log(base)
+
+# ceil, floor and round return ints in Python, so expressions using them are
+# evaluated row by row to keep results formatted the same as /calculate.
+VECTORIZED_FUNCTIONS = {
+    "sqrt": _unary(np.sqrt),
+    "sin": _unary(np.sin),
+    "cos": _unary(np.cos),
+    "tan": _unary(np.tan),
+    "log": _vector_log,
+    "log10": _unary(np.log10),
+    "exp": _unary(np.exp),
+    "fabs": _unary(np.fabs),
+}
+
+def _check_size(size):
+    if size > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large: {size} items (limit {MAX_BATCH_SIZE})")
+
+def evaluate_expressions(expressions):
+    _check_size(len(expressions))
+    results = []
+    for expression in expressions:
+        try:
+            result = safe_eval(preprocess_expression(expression))
+            results.append((expression, str(result), None))
+        except ValueError as e:
+            results.append((expression, None, str(e)))
+    return results
+
+def _evaluate_vectorized(node, names, columns, size):
+    try:
+        program = compile_expression(node, names, VECTORIZED_FUNCTIONS)
+    except TypeError:
+        return None
+    env = {name: np.asarray(column, dtype=float) for name, column in zip(names, columns)}
+    try:
+        with np.errstate(all="raise"):
+            values = np.broadcast_to(program(env), (size,))
+    except (FloatingPointError, ZeroDivisionError, OverflowError, ValueError, TypeError):
+        # Let the scalar path report exactly which rows failed
+        return None
+    return [str(value) for value in values.tolist()]
+
+def evaluate_bindings(expression, variables):
+    # Variables are bound by name, so the 'x' -> '*' heuristic of /calculate
+    # is not applied here.
+    names = list(variables)
+    columns = [variables[name] for name in names]
+    for name in names:
+        if not name.isidentifier() or name in ALLOWED_FUNCTIONS or name in ALLOWED_CONSTANTS:
+            raise ValueError(f"Invalid variable name: {name}")
+    size = len(columns[0])
+    if any(len(column) != size for column in columns):
+        raise ValueError("All variables must have the same number of values")
+    _check_size(size)
+
+    try:
+        tree = ast.parse(expression, mode='eval')
+        program = compile_expression(tree.body, names)
+    except (SyntaxError, TypeError) as e:
+        raise ValueError(f"Invalid expression or operation: {e}")
+    except (RecursionError, MemoryError):
+        raise ValueError(NESTED_TOO_DEEPLY)
+
+    labels = [
+        f"{expression} [" + ", ".join(f"{name}={column[i]}" for name, column in zip(names, columns)) + "]"
+        for i in range(size)
+    ]
+
+    values = _evaluate_vectorized(tree.body, names, columns, size)
+    if values is not None:
+        return [(label, value, None) for label, value in zip(labels, values)]
+
+    results = []
+    for i, label in enumerate(labels):
+        env = {name: column[i] for name, column in zip(names, columns)}
+        try:
+            results.append((label, str(program(env)), None))
+        except (TypeError, ZeroDivisionError, OverflowError) as e:
+            results.append((label, None, f"Invalid expression or operation: {e}"))
+        except ValueError as e:
+            results.append((label, None, str(e)))
+    return results
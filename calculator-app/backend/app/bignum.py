@@ -0,0 +1,252 @@
+import ast
+import math
+import operator
+import os
+import threading
+import time
+from fractions import Fraction
+
+import mpmath
+
+from .evaluator import ALLOWED_OPERATORS, NESTED_TOO_DEEPLY, Evaluator, safe_eval
+from .metrics import count_error, phase
+
+BIGNUM_MAX_OPERATIONS = int(os.getenv("BIGNUM_MAX_OPERATIONS", "10000"))
+BIGNUM_MAX_DIGITS = int(os.getenv("BIGNUM_MAX_DIGITS", "10000"))
+BIGNUM_MAX_EXPONENT = int(os.getenv("BIGNUM_MAX_EXPONENT", "1000000000"))
+BIGNUM_MAX_SECONDS = float(os.getenv("BIGNUM_MAX_SECONDS", "1.0"))
+BIGNUM_DEFAULT_PRECISION = int(os.getenv("BIGNUM_DEFAULT_PRECISION", "50"))
+
+BIGNUM_OPERATORS = {**ALLOWED_OPERATORS, ast.Pow: operator.pow}
+
+LOG2_10 = math.log2(10)
+
+# mpmath contexts are slow to build, so each thread keeps one and resets its
+# precision per evaluation; a private context keeps precision changes out of
+# other threads
+_contexts = threading.local()
+
+def _mp_context(precision):
+    ctx = getattr(_contexts, "ctx", None)
+    if ctx is None:
+        ctx = _contexts.ctx = mpmath.MPContext()
+    ctx.dps = precision
+    return ctx
+
+class BudgetExceeded(ValueError):
+    pass
+
+def _bits(value):
+    if isinstance(value, Fraction):
+        return max(value.numerator.bit_length(), value.denominator.bit_length())
+    return abs(value).bit_length()
+
+def _digits(value):
+    # Cheap upper bound on the decimal digits of an int or Fraction
+    return int(_bits(value) / LOG2_10) + 1
+
+class BudgetedEvaluator(Evaluator):
+    # Opt-in evaluator for exact and arbitrary-precision arithmetic, including
+    # ast.Pow. Every node visit counts against max_operations and the
+    # wall-clock deadline. Results that would grow beyond max_digits
+    # (or max_exponent in bigfloat mode) are refused before they are
+    # computed, so a single operation can't stall the worker either.
+    #
+    #   exact:    ints and Fractions only, unbounded size up to max_digits
+    #   bigfloat: mpmath floats with `precision` significant digits and an
+    #             exponent of up to max_exponent decimal digits
+    def __init__(
+        self,
+        mode,
+        precision=BIGNUM_DEFAULT_PRECISION,
+        max_operations=BIGNUM_MAX_OPERATIONS,
+        max_digits=BIGNUM_MAX_DIGITS,
+        max_exponent=BIGNUM_MAX_EXPONENT,
+        max_seconds=BIGNUM_MAX_SECONDS,
+    ):
+        if mode not in ("exact", "bigfloat"):
+            raise ValueError(f"Unknown evaluation mode: {mode}")
+        if not 1 <= precision <= max_digits:
+            raise BudgetExceeded(f"Precision must be between 1 and {max_digits} digits")
+        self.mode = mode
+        self.precision = precision
+        self.max_operations = max_operations
+        self.max_digits = max_digits
+        self.max_magnitude = max_exponent * LOG2_10
+        self.max_seconds = max_seconds
+        self.nodes = 0
+        self.largest = 0
+        self.started = time.perf_counter()
+        if mode == "exact":
+            self.ctx = None
+            self.functions = self._exact_functions()
+        else:
+            self.ctx = _mp_context(precision)
+            self.functions = self._bigfloat_functions()
+
+    def _exact_functions(self):
+        return {"fabs": abs, "ceil": math.ceil, "floor": math.floor, "round": round}
+
+    def _bigfloat_functions(self):
+        ctx = self.ctx
+        return {
+            "sqrt": ctx.sqrt,
+            "sin": self._trig(ctx.sin),
+            "cos": self._trig(ctx.cos),
+            "tan": self._trig(ctx.tan),
+            "log": self._log(ctx.log),
+            "log10": self._log(ctx.log10),
+            "exp": self._exp,
+            "fabs": ctx.fabs,
+            "ceil": ctx.ceil,
+            "floor": ctx.floor,
+            "round": self._round,
+        }
+
+    def cost(self):
+        return {
+            "mode": self.mode,
+            "nodes": self.nodes,
+            "elapsed_ms": (time.perf_counter() - self.started) * 1000,
+            "max_digits": self.largest,
+        }
+
+    def visit(self, node):
+        self.nodes += 1
+        if self.nodes > self.max_operations:
+            raise BudgetExceeded(f"Budget exceeded: more than {self.max_operations} operations")
+        if time.perf_counter() - self.started > self.max_seconds:
+            raise BudgetExceeded(f"Budget exceeded: evaluation took longer than {self.max_seconds}s")
+        return self._check(super().visit(node))
+
+    def _check(self, value):
+        if isinstance(value, complex) or (self.ctx is not None and isinstance(value, self.ctx.mpc)):
+            # e.g. sqrt(-1) or (-8) ** 0.5
+            raise TypeError(f"Complex numbers are not supported in {self.mode} mode")
+        if self.mode == "exact":
+            digits = _digits(value)
+            if digits > self.max_digits:
+                raise BudgetExceeded(f"Budget exceeded: result has more than {self.max_digits} digits")
+        else:
+            magnitude = self.ctx.mag(value) if value else 0
+            if abs(magnitude) > self.max_magnitude:
+                raise BudgetExceeded("Budget exceeded: result exponent is too large")
+            digits = self.precision
+        self.largest = max(self.largest, digits)
+        return value
+
+    def visit_Num(self, node):
+        value = node.n
+        if isinstance(value, complex):
+            raise TypeError(f"Complex numbers are not supported in {self.mode} mode")
+        if self.mode == "exact":
+            # repr() keeps the literal as typed, so 0.1 is exactly 1/10
+            return value if isinstance(value, int) else Fraction(repr(value))
+        return self.ctx.mpf(repr(value))
+
+    def visit_Name(self, node):
+        if node.id in ("pi", "e"):
+            if self.mode == "exact":
+                raise TypeError(f"'{node.id}' is irrational; use bigfloat mode")
+            return getattr(self.ctx, node.id) + 0
+        raise TypeError(f"Unsupported name: {node.id}")
+
+    def visit_BinOp(self, node):
+        op = BIGNUM_OPERATORS.get(type(node.op))
+        if op is None:
+            raise TypeError(f"Unsupported operation: {ast.dump(node.op)}")
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            return self._pow(left, right)
+        if isinstance(node.op, ast.Div) and self.mode == "exact":
+            return Fraction(left) / right
+        return op(left, right)
+
+    def visit_UnaryOp(self, node):
+        op = BIGNUM_OPERATORS.get(type(node.op))
+        if op is None:
+            raise TypeError(f"Unsupported operation: {ast.dump(node.op)}")
+        return op(self.visit(node.operand))
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id in self.functions:
+            args = [self.visit(arg) for arg in node.args]
+            return self.functions[node.func.id](*args)
+        raise TypeError(f"Unsupported function call in {self.mode} mode: {ast.dump(node)}")
+
+    def _pow(self, base, exponent):
+        if self.mode == "exact":
+            if isinstance(exponent, Fraction):
+                if exponent.denominator != 1:
+                    raise TypeError("Fractional powers are not exact; use bigfloat mode")
+                exponent = exponent.numerator
+            if abs(base) not in (0, 1) and abs(exponent) * _bits(base) / LOG2_10 > self.max_digits:
+                raise BudgetExceeded(f"Budget exceeded: result has more than {self.max_digits} digits")
+            if exponent < 0:
+                return Fraction(1) / (Fraction(base) ** -exponent)
+            return base ** exponent
+        if base and abs(exponent) * abs(self.ctx.log(abs(base), 2)) > self.max_magnitude:
+            raise BudgetExceeded("Budget exceeded: result exponent is too large")
+        return base ** exponent
+
+    def _exp(self, value):
+        if abs(value) * self.ctx.log(self.ctx.e, 2) > self.max_magnitude:
+            raise BudgetExceeded("Budget exceeded: result exponent is too large")
+        return self.ctx.exp(value)
+
+    def _trig(self, func):
+        # Argument reduction costs grow with the size of the argument
+        def call(value):
+            if self.ctx.mag(value) > self.max_digits * LOG2_10:
+                raise BudgetExceeded("Budget exceeded: argument is too large")
+            return func(value)
+        return call
+
+    def _log(self, func):
+        # mpmath gives -inf for 0, which would read as an exponent overflow
+        def call(value, *base):
+            if value == 0 or any(b in (0, 1) for b in base):
+                raise ValueError("math domain error")
+            return func(value, *base)
+        return call
+
+    def _round(self, value, ndigits=0):
+        scale = self.ctx.mpf(10) ** int(ndigits)
+        return self.ctx.nint(value * scale) / scale
+
+    def format(self, value):
+        if self.mode == "exact":
+            return str(value)
+        return mpmath.nstr(value, self.precision)
+
+def evaluate(expression, mode=None, precision=None):
+    # Returns (result string, cost), where cost is None for the default float mode
+    if mode in (None, "float"):
+        return str(safe_eval(expression)), None
+    if precision is None:
+        precision = BIGNUM_DEFAULT_PRECISION
+    elif isinstance(precision, bool) or not isinstance(precision, int):
+        raise ValueError("Precision must be a whole number of digits")
+    evaluator = BudgetedEvaluator(mode, precision)
+    try:
+        with phase("parse"):
+            node = ast.parse(expression, mode='eval')
+        with phase("evaluate"):
+            result = evaluator.format(evaluator.visit(node.body))
+    except BudgetExceeded as e:
+        count_error(e)
+        raise
+    except (RecursionError, MemoryError) as e:
+        # Deeply nested or very long expressions run out of stack before the
+        # operation budget is spent
+        count_error(e)
+        raise BudgetExceeded(NESTED_TOO_DEEPLY)
+    except ZeroDivisionError as e:
+        # Fraction and mpmath word this as "Fraction(1, 0)" or not at all
+        count_error(e)
+        raise ValueError("Invalid expression or operation: division by zero")
+    except (SyntaxError, TypeError, ValueError, OverflowError) as e:
+        count_error(e)
+        raise ValueError(f"Invalid expression or operation: {e}")
+    return result, evaluator.cost()
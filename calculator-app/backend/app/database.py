@@ -1,20 +1,127 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
 from dotenv import load_dotenv
 
-load_dotenv()
+from .metrics import TimedAsyncQueuePool, TimedQueuePool
 
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/calculator_db")
+# Connection settings come from the environment or a .env file. They are read
+# on first use rather than at import, so importing the app doesn't read files
+# from the working directory.
+_settings = None
+# First requests may arrive on several threads at once
+_lock = threading.RLock()
+
+def settings():
+    global _settings
+    with _lock:
+        if _settings is None:
+            load_dotenv()
+            database_url = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/calculator_db")
+            _settings = {
+                "database_url": database_url,
+                "async_database_url": os.getenv("ASYNC_DATABASE_URL", to_async_url(database_url)),
+                # Connection pool settings, shared by the sync and async engines
+                "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+                "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+                "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+            }
+    return _settings
+
+def engine_options(url, poolclass=None):
+    options = {"pool_pre_ping": settings()["pool_pre_ping"]}
+    if url.startswith("sqlite"):
+        # SQLite pools don't take size limits; FastAPI uses sessions across threads
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings()["pool_size"],
+            max_overflow=settings()["max_overflow"],
+            pool_timeout=settings()["pool_timeout"],
+        )
+    return options
+
+def to_async_url(url):
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engines are built on first use rather than at import, so importing the app
+# (e.g. in a preforking server's master) neither loads the database driver nor
+# connects. Each is rebuilt in a new process: connections can't be shared
+# across fork.
+_engine = None
+_sessionmaker = None
+_async_engine = None
+_async_sessionmaker = None
+_pid = None
+
+def _check_pid():
+    global _engine, _sessionmaker, _async_engine, _async_sessionmaker, _pid
+    if _pid != os.getpid():
+        if _engine is not None:
+            # Leave the parent's connections alone instead of closing them
+            _engine.dispose(close=False)
+        _engine = _sessionmaker = _async_engine = _async_sessionmaker = None
+        _pid = os.getpid()
+
+def get_engine():
+    global _engine
+    _check_pid()
+    with _lock:
+        if _engine is None:
+            url = settings()["database_url"]
+            _engine = create_engine(url, **engine_options(url, TimedQueuePool))
+    return _engine
+
+def SessionLocal():
+    global _sessionmaker
+    _check_pid()
+    with _lock:
+        if _sessionmaker is None:
+            _sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _sessionmaker()
+
+# The async engine also keeps the asyncpg/aiosqlite drivers optional for the
+# sync endpoints.
+def get_async_engine():
+    global _async_engine
+    _check_pid()
+    with _lock:
+        if _async_engine is None:
+            url = settings()["async_database_url"]
+            _async_engine = create_async_engine(url, **engine_options(url, TimedAsyncQueuePool))
+    return _async_engine
+
+def AsyncSessionLocal():
+    global _async_sessionmaker
+    _check_pid()
+    with _lock:
+        if _async_sessionmaker is None:
+            _async_sessionmaker = async_sessionmaker(
+                get_async_engine(), autoflush=False, expire_on_commit=False
+            )
+    return _async_sessionmaker()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,210 @@
+import ast
+import math
+import operator
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from .metrics import count_error, phase
+from .result_cache import create_result_cache
+
+# Define allowed operators for safe evaluation
+ALLOWED_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+# Define allowed functions for safe evaluation
+ALLOWED_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "log": math.log,
+    "log10": math.log10,
+    "exp": math.exp,
+    "fabs": math.fabs,
+    "ceil": math.ceil,
+    "floor": math.floor,
+    "round": round,
+}
+
+ALLOWED_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+NO_BINDINGS = {}
+
+class Evaluator(ast.NodeVisitor):
+    def visit_Num(self, node):
+        return node.n
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        return ALLOWED_OPERATORS[type(node.op)](left, right)
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        return ALLOWED_OPERATORS[type(node.op)](operand)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name):
+            func_name = node.func.id
+            if func_name in ALLOWED_FUNCTIONS:
+                args = [self.visit(arg) for arg in node.args]
+                return ALLOWED_FUNCTIONS[func_name](*args)
+        raise TypeError(f"Unsupported function call: {ast.dump(node)}")
+
+    def visit_Name(self, node):
+        if node.id in ALLOWED_CONSTANTS: # Allow constants
+            return getattr(math, node.id)
+        raise TypeError(f"Unsupported name: {node.id}")
+
+    def generic_visit(self, node):
+        raise TypeError(f"Unsupported operation: {ast.dump(node)}")
+
+def _lookup_operator(op):
+    try:
+        return ALLOWED_OPERATORS[type(op)]
+    except KeyError:
+        raise TypeError(f"Unsupported operation: {ast.dump(op)}")
+
+def compile_expression(node, variables=(), functions=ALLOWED_FUNCTIONS):
+    # Turn a validated AST into nested closures once, so evaluating it again
+    # needs neither ast.parse nor the per-node visit_* dispatch of Evaluator.
+    # Accepts the same node types as Evaluator and raises the same TypeErrors;
+    # names listed in `variables` are read from the mapping passed to the
+    # compiled program.
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float, complex):
+        value = node.value
+        return lambda env: value
+
+    if isinstance(node, ast.BinOp):
+        op = _lookup_operator(node.op)
+        left = compile_expression(node.left, variables, functions)
+        right = compile_expression(node.right, variables, functions)
+        return lambda env: op(left(env), right(env))
+
+    if isinstance(node, ast.UnaryOp):
+        op = _lookup_operator(node.op)
+        operand = compile_expression(node.operand, variables, functions)
+        return lambda env: op(operand(env))
+
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name) and node.func.id in functions:
+            func = functions[node.func.id]
+            args = [compile_expression(arg, variables, functions) for arg in node.args]
+            if len(args) == 1:
+                (arg,) = args
+                return lambda env: func(arg(env))
+            return lambda env: func(*[arg(env) for arg in args])
+        raise TypeError(f"Unsupported function call: {ast.dump(node)}")
+
+    if isinstance(node, ast.Name):
+        if node.id in variables:
+            name = node.id
+            return lambda env: env[name]
+        if node.id in ALLOWED_CONSTANTS:
+            value = ALLOWED_CONSTANTS[node.id]
+            return lambda env: value
+        raise TypeError(f"Unsupported name: {node.id}")
+
+    raise TypeError(f"Unsupported operation: {ast.dump(node)}")
+
+class ExpressionCache:
+    # Bounded LRU of compiled expressions. Lookups go by the exact source text
+    # first; on a miss the text is parsed and its AST dump is used as a second
+    # key, so "2+3" and "2 + 3" share a single compiled program. get() returns
+    # (key, program), where key is that canonical AST dump.
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.structural_hits = 0
+        self.misses = 0
+        self._by_text = OrderedDict()
+        self._by_structure = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, expression):
+        with self._lock:
+            entry = self._by_text.get(expression)
+            if entry is not None:
+                self._by_text.move_to_end(expression)
+                self.hits += 1
+                return entry
+
+        tree = ast.parse(expression, mode='eval')
+        key = ast.dump(tree.body)
+        with self._lock:
+            entry = self._by_structure.get(key)
+        if entry is None:
+            entry = (key, compile_expression(tree.body))
+
+        with self._lock:
+            if key in self._by_structure:
+                self.structural_hits += 1
+            else:
+                self.misses += 1
+            self._store(self._by_structure, key, entry)
+            self._store(self._by_text, expression, entry)
+        return entry
+
+    def _store(self, entries, key, entry):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._by_text.clear()
+            self._by_structure.clear()
+            self.hits = self.structural_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._by_text),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "structural_hits": self.structural_hits,
+                "misses": self.misses,
+            }
+
+expression_cache = ExpressionCache(int(os.getenv("EXPRESSION_CACHE_SIZE", "1024")))
+result_cache = create_result_cache()
+
+NESTED_TOO_DEEPLY = "Budget exceeded: expression is nested too deeply"
+
+# An 'x' that isn't part of a name, so "2x3" is multiplied but exp() is kept
+MULTIPLY_X = re.compile(r"(?<![A-Za-z_])x(?![A-Za-z_])")
+
+def preprocess_expression(expression):
+    # Replace 'x' with '*' for multiplication if it's a common calculator input
+    # This is a simple heuristic and might need more robust parsing for complex expressions
+    return MULTIPLY_X.sub('*', expression)
+
+def safe_eval(expression):
+    try:
+        with phase("parse"):
+            key, program = expression_cache.get(expression)
+        with phase("evaluate"):
+            result = result_cache.get(key)
+            if result is None:
+                result = program(NO_BINDINGS)
+                result_cache.set(key, result)
+        return result
+    except (SyntaxError, TypeError, ZeroDivisionError, OverflowError) as e:
+        count_error(e)
+        raise ValueError(f"Invalid expression or operation: {e}")
+    except (RecursionError, MemoryError) as e:
+        # Deeply nested input exhausts the stack in the parser or compiler
+        count_error(e)
+        raise ValueError(NESTED_TOO_DEEPLY)
+    except ValueError as e:
+        count_error(e)
+        raise
@@ -0,0 +1,64 @@
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import literal, select, tuple_
+
+from . import models
+
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "100"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "1000"))
+HISTORY_STREAM_BATCH = int(os.getenv("HISTORY_STREAM_BATCH", "1000"))
+
+def encode_cursor(calculation):
+    raw = f"{calculation.timestamp.isoformat()}|{calculation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, calculation_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(calculation_id)
+    except (ValueError, binascii.Error):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def history_query(cursor=None, limit=None):
+    # Keyset pagination: newest first, continuing strictly after the
+    # (timestamp, id) of the last row the client has seen. Served by the
+    # ix_calculations_timestamp_id index instead of sorting the table.
+    query = select(models.Calculation).order_by(
+        models.Calculation.timestamp.desc(), models.Calculation.id.desc()
+    )
+    if cursor is not None:
+        timestamp, calculation_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(models.Calculation.timestamp, models.Calculation.id)
+            < tuple_(
+                literal(timestamp, models.Calculation.timestamp.type),
+                literal(calculation_id, models.Calculation.id.type),
+            )
+        )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def to_ndjson(calculation):
+    return json.dumps({
+        "id": calculation.id,
+        "timestamp": calculation.timestamp.isoformat(),
+        "expression": calculation.expression,
+        "result": calculation.result,
+    }) + "\n"
+
+def stream_history(session_factory, cursor=None, limit=None):
+    # Uses its own session so the rows can still be read after the request
+    # handler has returned; yield_per makes psycopg2 use a server-side cursor.
+    db = session_factory()
+    try:
+        query = history_query(cursor, limit).execution_options(yield_per=HISTORY_STREAM_BATCH)
+        for calculation in db.execute(query).scalars():
+            yield to_ndjson(calculation)
+    finally:
+        db.close()
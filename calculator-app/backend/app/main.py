@@ -1,14 +1,28 @@
-from fastapi import FastAPI, Depends, HTTPException
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from starlette.middleware.cors import CORSMiddleware
-import ast
-import operator
-import math
-
-from . import models, schemas
-from .database import SessionLocal, engine
 
-models.Base.metadata.create_all(bind=engine)
+from . import async_api, models, schemas
+from .batch import evaluate_bindings, evaluate_expressions
+from .bignum import evaluate
+from .database import SessionLocal
+from .evaluator import expression_cache, preprocess_expression, result_cache
+from .history import (
+    HISTORY_MAX_PAGE_SIZE,
+    HISTORY_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    history_query,
+    stream_history,
+)
+from .metrics import MetricsMiddleware, phase, render, timed_handler
+from .rollups import STATS_TOP_EXPRESSIONS, history_stats, rollup_buffer
+from .writebehind import WriteBehindUnavailable, write_behind
 
 app = FastAPI()
 
@@ -18,7 +32,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(async_api.router)
+
+@app.on_event("startup")
+def start_write_behind():
+    rollup_buffer.start()
+    if write_behind is not None:
+        write_behind.start()
+
+@app.on_event("shutdown")
+def stop_write_behind():
+    # Flush every queued row, then the rollup counts, before the process exits
+    if write_behind is not None:
+        write_behind.stop()
+    rollup_buffer.stop()
 
 def get_db():
     db = SessionLocal()
@@ -27,85 +58,84 @@ def get_db():
     finally:
         db.close()
 
-# Define allowed operators for safe evaluation
-ALLOWED_OPERATORS = {
-    ast.Add: operator.add,
-    ast.Sub: operator.sub,
-    ast.Mult: operator.mul,
-    ast.Div: operator.truediv,
-    ast.USub: operator.neg,
-    ast.UAdd: operator.pos,
-}
-
-# Define allowed functions for safe evaluation
-ALLOWED_FUNCTIONS = {
-    "sqrt": math.sqrt,
-    "sin": math.sin,
-    "cos": math.cos,
-    "tan": math.tan,
-    "log": math.log,
-    "log10": math.log10,
-    "exp": math.exp,
-    "fabs": math.fabs,
-    "ceil": math.ceil,
-    "floor": math.floor,
-    "round": round,
-}
-
-class Evaluator(ast.NodeVisitor):
-    def visit_Num(self, node):
-        return node.n
-
-    def visit_BinOp(self, node):
-        left = self.visit(node.left)
-        right = self.visit(node.right)
-        return ALLOWED_OPERATORS[type(node.op)](left, right)
-
-    def visit_UnaryOp(self, node):
-        operand = self.visit(node.operand)
-        return ALLOWED_OPERATORS[type(node.op)](operand)
-
-    def visit_Call(self, node):
-        if isinstance(node.func, ast.Name):
-            func_name = node.func.id
-            if func_name in ALLOWED_FUNCTIONS:
-                args = [self.visit(arg) for arg in node.args]
-                return ALLOWED_FUNCTIONS[func_name](*args)
-        raise TypeError(f"Unsupported function call: {ast.dump(node)}")
-
-    def visit_Name(self, node):
-        if node.id in ["pi", "e"]: # Allow constants
-            return getattr(math, node.id)
-        raise TypeError(f"Unsupported name: {node.id}")
-
-    def generic_visit(self, node):
-        raise TypeError(f"Unsupported operation: {ast.dump(node)}")
-
-def safe_eval(expression):
-    try:
-        node = ast.parse(expression, mode='eval')
-        return Evaluator().visit(node.body)
-    except (SyntaxError, TypeError, ZeroDivisionError, OverflowError) as e:
-        raise ValueError(f"Invalid expression or operation: {e}")
-
 @app.post("/calculate", response_model=schemas.CalculationResponse)
+@timed_handler
 def calculate_expression(
     calculation: schemas.CalculationCreate, db: Session = Depends(get_db)
 ):
     try:
-        # Replace 'x' with '*' for multiplication if it's a common calculator input
-        # This is a simple heuristic and might need more robust parsing for complex expressions
-        processed_expression = calculation.expression.replace('x', '*')
-        result_value = safe_eval(processed_expression)
-        result_str = str(result_value)
+        processed_expression = preprocess_expression(calculation.expression)
+        result_str, cost = evaluate(
+            processed_expression, calculation.mode, calculation.precision
+        )
 
+        if write_behind is not None:
+            with phase("enqueue"):
+                row = write_behind.enqueue(calculation.expression, result_str)
+            return {**row, "cost": cost}
+
+        # Stamped here rather than by the database so the rollup bucket is
+        # the row's own minute
+        timestamp = datetime.now(timezone.utc)
         db_calculation = models.Calculation(
-            expression=calculation.expression, result=result_str
+            expression=calculation.expression, result=result_str, timestamp=timestamp
         )
-        db.add(db_calculation)
-        db.commit()
-        db.refresh(db_calculation)
+        with phase("insert"):
+            db.add(db_calculation)
+            db.flush()
+        with phase("commit"):
+            db.commit()
+        # Counted once committed; rollup_buffer writes the rollup rows
+        rollup_buffer.add([(timestamp, processed_expression)])
+        with phase("refresh"):
+            db.refresh(db_calculation)
+        db_calculation.cost = cost
         return db_calculation
+    except WriteBehindUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+
+
+@app.post("/calculate/batch", response_model=schemas.BatchCalculationResponse)
+@timed_handler
+def calculate_batch(
+    batch: schemas.BatchCalculationCreate, db: Session = Depends(get_db)
+):
+    try:
+        if batch.expressions is not None and batch.expression is None and batch.variables is None:
+            items = evaluate_expressions(batch.expressions)
+            # Rollups count the expression as evaluated; rows from variable
+            # bindings all count towards their template
+            rollup_expression = preprocess_expression
+        elif batch.expressions is None and batch.expression is not None and batch.variables:
+            items = evaluate_bindings(batch.expression, batch.variables)
+            rollup_expression = lambda label: batch.expression
+        else:
+            raise ValueError("Provide either 'expressions', or 'expression' with 'variables'")
+
+        # One multi-row INSERT and a single commit for the whole batch
+        timestamp = datetime.now(timezone.utc)
+        rows = [
+            {"expression": expression, "result": result, "timestamp": timestamp}
+            for expression, result, error in items
+            if error is None
+        ]
+        if rows:
+            with phase("insert"):
+                db.execute(insert(models.Calculation), rows)
+            with phase("commit"):
+                db.commit()
+            rollup_buffer.add([(timestamp, rollup_expression(row["expression"])) for row in rows])
+        return {
+            "results": [
+                {"expression": expression, "result": result, "error": error}
+                for expression, result, error in items
+            ],
+            "stored": len(rows),
+        }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -113,6 +143,73 @@ def calculate_expression(
 
 
 @app.get("/history", response_model=list[schemas.CalculationResponse])
-def get_calculation_history(db: Session = Depends(get_db)):
-    history = db.query(models.Calculation).order_by(models.Calculation.timestamp.desc()).all()
+@timed_handler
+def get_calculation_history(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db),
+):
+    try:
+        if cursor is not None:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        # Streams every row after the cursor unless a limit is given
+        return StreamingResponse(
+            stream_history(SessionLocal, cursor, limit), media_type="application/x-ndjson"
+        )
+
+    limit = min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)
+    with phase("query"):
+        history = db.execute(history_query(cursor, limit)).scalars().all()
+    if len(history) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(history[-1])
     return history
+
+
+@app.get("/history/stats", response_model=schemas.HistoryStatsResponse)
+@timed_handler
+def get_history_stats(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Literal["minute", "hour", "day"] = "minute",
+    top: int = Query(STATS_TOP_EXPRESSIONS, ge=0),
+    db: Session = Depends(get_db),
+):
+    try:
+        with phase("query"):
+            return history_stats(db, start, end, bucket, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/stats/expression-cache")
+def get_expression_cache_stats():
+    return expression_cache.stats()
+
+
+@app.get("/stats/result-cache")
+def get_result_cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/stats/rollups")
+def get_rollup_stats():
+    return rollup_buffer.stats()
+
+
+@app.get("/stats/write-behind")
+def get_write_behind_stats():
+    if write_behind is None:
+        return {"enabled": False}
+    return write_behind.stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
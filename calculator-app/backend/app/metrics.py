@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+REQUEST_LATENCY = Histogram(
+    "calculator_request_duration_seconds",
+    "End-to-end request latency",
+    ["method", "endpoint", "status"],
+)
+PHASE_LATENCY = Histogram(
+    "calculator_phase_duration_seconds",
+    "Time spent in each phase of a request (parse, evaluate, insert, commit, ...)",
+    ["endpoint", "phase"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "calculator_db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+EVALUATION_ERRORS = Counter(
+    "calculator_evaluation_errors_total",
+    "Expressions rejected by the evaluator, by exception type",
+    ["kind"],
+)
+
+# Per-request state shared between the middleware and the handler. Sync
+# handlers run in a worker thread with a copy of the context, so this holds a
+# mutable dict rather than values set from the handler side.
+_request = contextvars.ContextVar("calculator_request", default=None)
+
+def _endpoint():
+    request = _request.get()
+    return request["endpoint"] if request is not None else ""
+
+def observe_phase(name, seconds):
+    PHASE_LATENCY.labels(_endpoint(), name).observe(seconds)
+
+@contextmanager
+def phase(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(name, time.perf_counter() - started)
+
+def count_error(error):
+    EVALUATION_ERRORS.labels(type(error).__name__).inc()
+
+def observe_checkout(engine, seconds):
+    POOL_CHECKOUT_WAIT.labels(engine).observe(seconds)
+    observe_phase("pool_checkout", seconds)
+
+class TimedQueuePool(QueuePool):
+    # _do_get is where QueuePool blocks until a connection is free, so timing
+    # it measures pool starvation rather than query time
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_checkout(self.metrics_label, time.perf_counter() - started)
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_checkout(self.metrics_label, time.perf_counter() - started)
+
+def _handler_finished():
+    request = _request.get()
+    if request is not None:
+        request["handler_done"] = time.perf_counter()
+
+def timed_handler(func):
+    # Marks when the endpoint function returns, so the middleware can report
+    # the time FastAPI spends validating and encoding the response as the
+    # "serialize" phase
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _handler_finished()
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _handler_finished()
+    return wrapper
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (no BaseHTTPMiddleware task overhead) recording
+    # the latency of every request by route and status code
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = {"endpoint": scope["path"]}
+        token = _request.set(request)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if "handler_done" in request:
+                    observe_phase("serialize", time.perf_counter() - request["handler_done"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            # Unrouted paths share one label so 404 scans can't blow up cardinality
+            endpoint = scope["path"] if "endpoint" in scope else "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], endpoint, str(status)).observe(
+                time.perf_counter() - started
+            )
+            _request.reset(token)
+
+def render():
+    # With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every worker
+    # writes its samples there, and any worker can serve the merged view
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
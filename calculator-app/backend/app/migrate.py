@@ -0,0 +1,77 @@
+# Creates the database schema. Run once per deploy, before the servers start:
+#
+#   python -m app.migrate
+#   python -m app.migrate --rebuild-rollups
+#
+# Importing the app never touches the database, so tables have to exist
+# before the first request.
+import argparse
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from . import models
+from .database import SessionLocal, get_engine
+from .rollups import ROLLUP_MODELS, rebuild_rollups
+
+def create_indexes(engine):
+    # create_all only builds indexes together with their table, so indexes
+    # added to an existing table (e.g. ix_calculations_timestamp_id) are
+    # created here. PostgreSQL builds them CONCURRENTLY, which doesn't block
+    # writes but can't run inside a transaction.
+    concurrent = engine.dialect.name == "postgresql"
+    with engine.connect() as conn:
+        if concurrent:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in models.Base.metadata.sorted_tables:
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if not concurrent:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                    continue
+                # An interrupted concurrent build leaves an invalid index that
+                # IF NOT EXISTS would skip, so it is dropped and built again
+                invalid = conn.execute(
+                    text(
+                        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                        "WHERE c.relname = :name AND pg_table_is_visible(c.oid) AND NOT i.indisvalid"
+                    ),
+                    {"name": index.name},
+                ).first()
+                if invalid:
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                options = index.dialect_options["postgresql"]
+                options["concurrently"] = True
+                try:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                finally:
+                    options["concurrently"] = False
+        conn.commit()
+
+def migrate():
+    # Returns the names of the tables it created
+    engine = get_engine()
+    existing = set(inspect(engine).get_table_names())
+    models.Base.metadata.create_all(bind=engine)
+    create_indexes(engine)
+    return [table.name for table in models.Base.metadata.sorted_tables if table.name not in existing]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create the calculator database schema")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="recount the /history/stats rollups from the calculations table")
+    args = parser.parse_args(argv)
+
+    created = migrate()
+    print("Schema is up to date")
+    # Rollup tables added to a database that already has calculations start
+    # out empty, so they are filled from the stored rows
+    new_rollups = any(model.__tablename__ in created for model in ROLLUP_MODELS)
+    if args.rebuild_rollups or (new_rollups and models.Calculation.__tablename__ not in created):
+        db = SessionLocal()
+        try:
+            print(f"Rebuilt rollups from {rebuild_rollups(db)} calculations")
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,67 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from .database import Base
 
+# SQLite stores timestamps as text and its CURRENT_TIMESTAMP has no fractional
+# seconds; bind values in the same format so keyset comparisons line up.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
 class Calculation(Base):
     __tablename__ = "calculations"
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(Timestamp, server_default=func.now())
     expression = Column(Text, nullable=False)
     result = Column(Text, nullable=False)
+
+    # Matches the ORDER BY timestamp DESC, id DESC of /history so pages are
+    # read straight off the index. Existing databases get it from
+    # `python -m app.migrate`.
+    __table_args__ = (Index("ix_calculations_timestamp_id", "timestamp", "id"),)
+
+# Rollups kept up to date by rollups.rollup_buffer and the write-behind
+# flusher, so /history/stats reads bucket counts instead of scanning
+# calculations.
+# Each granularity has its own tables; a range is answered from the coarsest
+# buckets that fit inside it.
+class BucketCount:
+    bucket = Column(Timestamp, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+class BucketExpressionCount:
+    bucket = Column(Timestamp, primary_key=True)
+    expression_hash = Column(String(40), primary_key=True)
+    expression = Column(Text, nullable=False)
+    count = Column(Integer, nullable=False)
+
+class CalculationMinute(BucketCount, Base):
+    __tablename__ = "calculation_minutes"
+
+class CalculationHour(BucketCount, Base):
+    __tablename__ = "calculation_hours"
+
+class CalculationDay(BucketCount, Base):
+    __tablename__ = "calculation_days"
+
+class ExpressionMinute(BucketExpressionCount, Base):
+    __tablename__ = "expression_minutes"
+
+class ExpressionHour(BucketExpressionCount, Base):
+    __tablename__ = "expression_hours"
+
+class ExpressionDay(BucketExpressionCount, Base):
+    __tablename__ = "expression_days"
+
+# All-time count per expression, for stats without a time range
+class ExpressionTotal(Base):
+    __tablename__ = "expression_totals"
+
+    expression_hash = Column(String(40), primary_key=True)
+    expression = Column(Text, nullable=False)
+    count = Column(Integer, nullable=False)
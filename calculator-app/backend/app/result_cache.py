@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE = os.getenv("RESULT_CACHE", "memory")
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Keys deleted per DEL when a Redis cache is cleared
+REDIS_CLEAR_BATCH = 500
+
+# Results of pure expressions never change, so they can be cached by the
+# canonical AST key from ExpressionCache ("2+3" and "2 + 3" share an entry).
+# Backends implement get(key) -> value or None, set(key, value), clear() and
+# stats().
+
+class NullResultCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+class InMemoryResultCache:
+    # LRU with a per-entry TTL. The clock can be swapped out in tests.
+    def __init__(self, maxsize=4096, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expired = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+            }
+
+class RedisResultCache:
+    # Shared across workers; size is bounded by the server's maxmemory policy
+    # and entries expire after ttl seconds. Redis errors count as misses.
+    def __init__(self, url, ttl=3600, prefix="calc:result:"):
+        import redis
+
+        self._redis = redis
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        # Requests share the cache across threads; the lock is never held
+        # during a Redis round trip
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _key(self, key):
+        return self.prefix + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        try:
+            raw = self._client.get(self._key(key))
+        except self._redis.RedisError:
+            self._count("errors")
+            return None
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        kind, text = json.loads(raw)
+        return {"int": int, "float": float, "complex": complex}[kind](text)
+
+    def set(self, key, value):
+        raw = json.dumps([type(value).__name__, repr(value)])
+        try:
+            self._client.set(self._key(key), raw, ex=max(1, int(self.ttl)))
+        except self._redis.RedisError:
+            self._count("errors")
+
+    def clear(self):
+        # Only this cache's keys: the database may be shared, so no FLUSHDB.
+        # SCAN walks the keyspace in steps instead of blocking Redis like KEYS.
+        try:
+            batch = []
+            for key in self._client.scan_iter(match=self.prefix + "*", count=REDIS_CLEAR_BATCH):
+                batch.append(key)
+                if len(batch) >= REDIS_CLEAR_BATCH:
+                    self._client.delete(*batch)
+                    batch = []
+            if batch:
+                self._client.delete(*batch)
+        except self._redis.RedisError:
+            self._count("errors")
+            return
+        with self._lock:
+            self.hits = self.misses = self.errors = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "redis",
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+            }
+
+def create_result_cache(backend=RESULT_CACHE):
+    if backend == "memory":
+        return InMemoryResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+    if backend == "redis":
+        return RedisResultCache(REDIS_URL, RESULT_CACHE_TTL)
+    if backend == "none":
+        return NullResultCache()
+    raise ValueError(f"Unknown RESULT_CACHE backend: {backend}")
@@ -0,0 +1,325 @@
+import ast
+import hashlib
+import os
+import threading
+from collections import Counter
+from datetime import timedelta, timezone
+from functools import lru_cache
+
+from sqlalchemy import delete, func, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import models
+from .database import SessionLocal
+from .evaluator import preprocess_expression
+
+STATS_TOP_EXPRESSIONS = int(os.getenv("STATS_TOP_EXPRESSIONS", "10"))
+STATS_MAX_TOP_EXPRESSIONS = int(os.getenv("STATS_MAX_TOP_EXPRESSIONS", "1000"))
+ROLLUP_REBUILD_BATCH = int(os.getenv("ROLLUP_REBUILD_BATCH", "10000"))
+ROLLUP_FLUSH_INTERVAL = float(os.getenv("ROLLUP_FLUSH_INTERVAL", "1.0"))
+
+BUCKET_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+
+# Series and per-expression rollup tables for each bucket size, finest first
+ROLLUPS = {
+    "minute": (models.CalculationMinute, models.ExpressionMinute),
+    "hour": (models.CalculationHour, models.ExpressionHour),
+    "day": (models.CalculationDay, models.ExpressionDay),
+}
+ROLLUP_MODELS = [model for tables in ROLLUPS.values() for model in tables] + [models.ExpressionTotal]
+
+@lru_cache(maxsize=4096)
+def normalize_expression(expression):
+    # "2*3", "2 * 3" and "(2)*3" are counted as one expression: the text
+    # printed back from its AST. Callers pass the expression as evaluated,
+    # i.e. preprocessed for /calculate and the template for variable bindings.
+    try:
+        return ast.unparse(ast.parse(expression, mode='eval'))
+    except (SyntaxError, ValueError):
+        return " ".join(expression.split())
+
+def expression_hash(normalized):
+    # Keys the rollup rows, so long expressions don't end up in an index
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+def to_utc(timestamp):
+    # Naive timestamps are UTC, as stored by SQLite
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+def minute_of(timestamp):
+    return to_utc(timestamp).replace(second=0, microsecond=0)
+
+def _bucket_start(timestamp, seconds):
+    # Buckets are aligned to the Unix epoch, so days start at 00:00 UTC
+    return timestamp - timedelta(seconds=timestamp.timestamp() % seconds)
+
+def _bucket_end(timestamp, seconds):
+    start = _bucket_start(timestamp, seconds)
+    return start if start == timestamp else start + timedelta(seconds=seconds)
+
+def _upsert(db, table, rows, keys):
+    # count = count + excluded.count, so concurrent writers add up instead of
+    # overwriting each other. Rows go in key order to keep lock order stable.
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys, set_={"count": table.c.count + statement.excluded.count}
+        )
+        db.execute(statement, rows)
+        return
+    for row in rows:
+        updated = db.execute(
+            update(table)
+            .where(*(table.c[key] == row[key] for key in keys))
+            .values(count=table.c.count + row["count"])
+        )
+        if updated.rowcount == 0:
+            db.execute(table.insert(), [row])
+
+def tally(entries):
+    # (minute, normalized expression) -> count for (timestamp, expression) pairs
+    return Counter((minute_of(timestamp), normalize_expression(expression)) for timestamp, expression in entries)
+
+def add_counts(db, counts):
+    # Adds a tally() to every rollup in the caller's transaction. Tables are
+    # written in a fixed order, rows in key order.
+    per_bucket = {bucket: Counter() for bucket in ROLLUPS}
+    per_expression = {bucket: Counter() for bucket in ROLLUPS}
+    totals = Counter()
+    expressions = {}
+    for (minute, normalized), count in counts.items():
+        digest = expression_hash(normalized)
+        expressions[digest] = normalized
+        totals[digest] += count
+        for bucket, seconds in BUCKET_SECONDS.items():
+            start = _bucket_start(minute, seconds)
+            per_bucket[bucket][start] += count
+            per_expression[bucket][start, digest] += count
+
+    for bucket, (series_model, expression_model) in ROLLUPS.items():
+        _upsert(
+            db,
+            series_model.__table__,
+            [{"bucket": start, "count": count} for start, count in per_bucket[bucket].items()],
+            ["bucket"],
+        )
+        _upsert(
+            db,
+            expression_model.__table__,
+            [
+                {"bucket": start, "expression_hash": digest, "expression": expressions[digest], "count": count}
+                for (start, digest), count in per_expression[bucket].items()
+            ],
+            ["bucket", "expression_hash"],
+        )
+    _upsert(
+        db,
+        models.ExpressionTotal.__table__,
+        [
+            {"expression_hash": digest, "expression": expressions[digest], "count": count}
+            for digest, count in totals.items()
+        ],
+        ["expression_hash"],
+    )
+
+def record_calculations(db, entries):
+    # Adds (timestamp, expression) pairs to the rollups in the caller's
+    # transaction, for writers that already batch (write-behind, rebuilds)
+    add_counts(db, tally(entries))
+
+class RollupBuffer:
+    # Collects the rollup counts of committed calculations and adds them to
+    # the rollup tables from a background thread every flush_interval
+    # seconds, in a transaction of its own. Every request would otherwise
+    # update the same minute, hour and day rows and wait on their row locks
+    # until it commits; this way each process takes them once per interval.
+    #
+    # Counts not yet flushed are lost if the process dies; `python -m
+    # app.migrate --rebuild-rollups` recounts them from the stored rows.
+    def __init__(self, session_factory, flush_interval=1.0):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.failures = 0
+        self.last_error = None
+
+    def add(self, entries):
+        counts = tally(entries)
+        with self._lock:
+            self._pending.update(counts)
+
+    def flush(self):
+        with self._lock:
+            counts, self._pending = self._pending, Counter()
+        if not counts:
+            return
+        db = self.session_factory()
+        try:
+            add_counts(db, counts)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Kept for the next flush; counts for one (minute, expression)
+            # merge, so this stays bounded while the database is down
+            with self._lock:
+                self._pending.update(counts)
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self.flushes += 1
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="rollups", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "flush_interval": self.flush_interval,
+                "pending": len(self._pending),
+                "flushes": self.flushes,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+rollup_buffer = RollupBuffer(SessionLocal, ROLLUP_FLUSH_INTERVAL)
+
+def _pieces(start, end, buckets):
+    # Splits [start, end) into (bucket, start, end) ranges of whole buckets,
+    # using the coarsest of `buckets` (finest first) that fit; None is open
+    bucket, finer = buckets[-1], buckets[:-1]
+    if not finer:
+        return [(bucket, start, end)]
+    seconds = BUCKET_SECONDS[bucket]
+    inner_start = start if start is None else _bucket_end(start, seconds)
+    inner_end = end if end is None else _bucket_start(end, seconds)
+    if inner_start is not None and inner_end is not None and inner_start >= inner_end:
+        return _pieces(start, end, finer)
+    pieces = [(bucket, inner_start, inner_end)]
+    if start is not None and start < inner_start:
+        pieces += _pieces(start, inner_start, finer)
+    if end is not None and inner_end < end:
+        pieces += _pieces(inner_end, end, finer)
+    return pieces
+
+def _range_filter(column, start, end):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return conditions
+
+def history_stats(db, start=None, end=None, bucket="minute", top=STATS_TOP_EXPRESSIONS):
+    # Reads only the rollup tables. The range is widened to whole minutes (the
+    # minute containing start through the last minute that begins before
+    # end) and read from day, hour and minute rows as they fit, so the cost
+    # grows with the number of buckets rather than calculations.
+    if start is not None and end is not None and to_utc(start) >= to_utc(end):
+        raise ValueError("start must be before end")
+    seconds = BUCKET_SECONDS[bucket]
+    top = min(top, STATS_MAX_TOP_EXPRESSIONS)
+    low = minute_of(start) if start is not None else None
+    high = _bucket_end(to_utc(end), 60) if end is not None else None
+
+    # The series can only be read from buckets no coarser than its own
+    finer = [name for name in BUCKET_SECONDS if BUCKET_SECONDS[name] <= seconds]
+    series = Counter()
+    for piece, piece_start, piece_end in _pieces(low, high, finer):
+        model = ROLLUPS[piece][0]
+        rows = db.execute(
+            select(model.bucket, model.count).where(*_range_filter(model.bucket, piece_start, piece_end))
+        )
+        for bucket_start, count in rows:
+            series[_bucket_start(to_utc(bucket_start), seconds)] += count
+
+    top_rows = []
+    if top > 0 and low is None and high is None:
+        totals = models.ExpressionTotal
+        top_rows = db.execute(
+            select(totals.expression, totals.count)
+            .order_by(totals.count.desc(), totals.expression)
+            .limit(top)
+        ).all()
+    elif top > 0:
+        parts = []
+        for piece, piece_start, piece_end in _pieces(low, high, list(BUCKET_SECONDS)):
+            model = ROLLUPS[piece][1]
+            parts.append(
+                select(model.expression_hash, model.expression, model.count)
+                .where(*_range_filter(model.bucket, piece_start, piece_end))
+            )
+        counts = union_all(*parts).subquery()
+        total = func.sum(counts.c.count)
+        top_rows = db.execute(
+            select(func.max(counts.c.expression), total)
+            .group_by(counts.c.expression_hash)
+            .order_by(total.desc(), func.max(counts.c.expression))
+            .limit(top)
+        ).all()
+
+    return {
+        "start": to_utc(start) if start is not None else None,
+        "end": to_utc(end) if end is not None else None,
+        "bucket": bucket,
+        "total": sum(series.values()),
+        "buckets": [{"start": key, "count": series[key]} for key in sorted(series)],
+        "top_expressions": [{"expression": expression, "count": count} for expression, count in top_rows],
+    }
+
+def rebuild_rollups(db):
+    # Recounts the rollups from every stored calculation, for databases that
+    # have rows from before the rollup tables existed. Only the stored text is
+    # left by then, so rows from variable bindings count under their
+    # "expr [x=1]" label rather than the template.
+    for model in ROLLUP_MODELS:
+        db.execute(delete(model))
+    query = select(models.Calculation.timestamp, models.Calculation.expression).execution_options(
+        yield_per=ROLLUP_REBUILD_BATCH
+    )
+    rows = 0
+    batch = []
+    for timestamp, expression in db.execute(query):
+        if timestamp is None:
+            continue
+        batch.append((timestamp, preprocess_expression(expression)))
+        if len(batch) >= ROLLUP_REBUILD_BATCH:
+            record_calculations(db, batch)
+            rows += len(batch)
+            batch = []
+    record_calculations(db, batch)
+    rows += len(batch)
+    db.commit()
+    return rows
+
+if __name__ == "__main__":
+    from .migrate import main
+
+    main(["--rebuild-rollups"])
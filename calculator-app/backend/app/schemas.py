@@ -1,16 +1,60 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
 class CalculationBase(BaseModel):
     expression: str
 
 class CalculationCreate(CalculationBase):
-    pass
+    # "exact" and "bigfloat" opt into the budgeted arbitrary-precision
+    # evaluator; precision is in significant digits for bigfloat
+    mode: Optional[Literal["float", "exact", "bigfloat"]] = None
+    precision: Optional[int] = None
+
+class EvaluationCost(BaseModel):
+    mode: str
+    nodes: int
+    elapsed_ms: float
+    max_digits: int
 
 class CalculationResponse(CalculationBase):
-    id: int
+    # None while the row is still queued in write-behind mode
+    id: Optional[int] = None
     timestamp: datetime
     result: str
+    cost: Optional[EvaluationCost] = None
 
     class Config:
         orm_mode = True
+
+class BatchCalculationCreate(BaseModel):
+    # Either a list of independent expressions, or one expression evaluated
+    # over equally long arrays of variable bindings
+    expressions: Optional[List[str]] = None
+    expression: Optional[str] = None
+    variables: Optional[Dict[str, List[float]]] = None
+
+class BatchCalculationResult(BaseModel):
+    expression: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchCalculationResponse(BaseModel):
+    results: List[BatchCalculationResult]
+    stored: int
+
+class StatsBucket(BaseModel):
+    start: datetime
+    count: int
+
+class ExpressionCount(BaseModel):
+    expression: str
+    count: int
+
+class HistoryStatsResponse(BaseModel):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    bucket: str
+    total: int
+    buckets: List[StatsBucket]
+    top_expressions: List[ExpressionCount]
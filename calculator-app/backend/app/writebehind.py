@@ -0,0 +1,252 @@
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from . import models
+from .database import SessionLocal
+from .evaluator import preprocess_expression
+from .rollups import record_calculations
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "100000"))
+WRITE_BEHIND_RETRIES = int(os.getenv("WRITE_BEHIND_RETRIES", "5"))
+WRITE_BEHIND_RETRY_BACKOFF = float(os.getenv("WRITE_BEHIND_RETRY_BACKOFF", "0.5"))
+# Batches that still fail after the retries are appended here as JSON lines
+# and written again when a flush thread next starts. Keep it on a persistent
+# volume in production.
+WRITE_BEHIND_SPILL_PATH = os.getenv(
+    "WRITE_BEHIND_SPILL_PATH", os.path.join(tempfile.gettempdir(), "calculator-write-behind.jsonl")
+)
+
+class WriteBehindUnavailable(RuntimeError):
+    # The queue is full or the buffer has been stopped; handlers answer 503
+    pass
+
+class WriteBehindBuffer:
+    # Queues Calculation rows and writes them from a background thread in
+    # batches of up to batch_size rows, or whatever arrived within
+    # flush_interval seconds, as one executemany INSERT per batch.
+    #
+    # A failed batch is retried with exponential backoff; if the database is
+    # still unavailable the rows are spilled to spill_path rather than lost.
+    def __init__(
+        self,
+        session_factory,
+        batch_size=500,
+        flush_interval=0.5,
+        max_queue=100000,
+        retries=5,
+        retry_backoff=0.5,
+        spill_path=None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._closed = True
+        self._thread = None
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.rows_enqueued = 0
+        self.rows_written = 0
+        self.rows_retried = 0
+        self.rows_spilled = 0
+        self.rows_replayed = 0
+        self.rows_failed = 0
+        self.last_error = None
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            with self._lock:
+                self._closed = False
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        # Refuses new rows, then drains everything still queued before
+        # returning
+        with self._lock:
+            self._closed = True
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, expression, result):
+        # Never blocks: a full queue raises WriteBehindUnavailable so callers
+        # push back on clients instead of stalling a worker or event loop
+        row = {
+            "expression": expression,
+            "result": result,
+            "timestamp": datetime.now(timezone.utc),
+        }
+        # Checked under the lock stop() takes, so every accepted row is still
+        # drained by the flush thread
+        with self._lock:
+            if self._closed:
+                raise WriteBehindUnavailable("Write-behind buffer is not running")
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                raise WriteBehindUnavailable("Write-behind queue is full, retry later")
+            self.rows_enqueued += 1
+        return row
+
+    def _run(self):
+        self._replay_spill()
+        while not self._stopping.is_set() or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self.flush(batch)
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows):
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.Calculation), rows)
+            # Only /calculate enqueues, so rows hold unprocessed input
+            record_calculations(db, [(row["timestamp"], preprocess_expression(row["expression"])) for row in rows])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def flush(self, rows):
+        started = time.perf_counter()
+        written, spilled, failed, error = 0, 0, 0, None
+        for attempt in range(self.retries + 1):
+            try:
+                self._write(rows)
+                written = len(rows)
+                break
+            except Exception as e:
+                error = str(e)
+                if attempt == self.retries:
+                    break
+                with self._lock:
+                    self.rows_retried += len(rows)
+                time.sleep(self.retry_backoff * 2 ** attempt)
+        if not written:
+            try:
+                self._spill(rows)
+                spilled = len(rows)
+            except OSError as e:
+                failed, error = len(rows), f"{error}; spilling failed: {e}"
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.flushes += 1
+            self.rows_written += written
+            self.rows_spilled += spilled
+            self.rows_failed += failed
+            if error is not None:
+                self.last_error = error
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.total_flush_seconds += elapsed
+
+    def _spill(self, rows):
+        if not self.spill_path:
+            raise OSError("no spill path configured")
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({**row, "timestamp": row["timestamp"].isoformat()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replay_spill(self):
+        # Runs on the flush thread, so startup never waits for the database.
+        # Renaming the file first lets only one worker replay it.
+        if not self.spill_path:
+            return
+        replaying = f"{self.spill_path}.{os.getpid()}.replay"
+        try:
+            os.replace(self.spill_path, replaying)
+        except FileNotFoundError:
+            return
+        with open(replaying, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        for row in rows:
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+        written = 0
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                self._write(rows[start : start + self.batch_size])
+                written = start + len(rows[start : start + self.batch_size])
+        except Exception as e:
+            try:
+                self._spill(rows[written:])
+            except OSError:
+                # Leave the replay file in place for manual recovery
+                with self._lock:
+                    self.last_error = f"Replaying {replaying} failed: {e}"
+                return
+            with self._lock:
+                self.last_error = f"Replaying spilled rows failed: {e}"
+        with self._lock:
+            self.rows_replayed += written
+        os.remove(replaying)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": True,
+                "queue_depth": self._queue.qsize(),
+                # Includes rows already taken off the queue for the next batch
+                "pending_rows": self.rows_enqueued - self.rows_written - self.rows_spilled - self.rows_failed,
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "rows_retried": self.rows_retried,
+                "rows_spilled": self.rows_spilled,
+                "rows_replayed": self.rows_replayed,
+                "rows_failed": self.rows_failed,
+                "spill_path": self.spill_path,
+                "last_error": self.last_error,
+                "last_flush_seconds": self.last_flush_seconds,
+                "max_flush_seconds": self.max_flush_seconds,
+                "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            }
+
+write_behind = (
+    WriteBehindBuffer(
+        SessionLocal,
+        batch_size=WRITE_BEHIND_BATCH_SIZE,
+        flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+        max_queue=WRITE_BEHIND_MAX_QUEUE,
+        retries=WRITE_BEHIND_RETRIES,
+        retry_backoff=WRITE_BEHIND_RETRY_BACKOFF,
+        spill_path=WRITE_BEHIND_SPILL_PATH,
+    )
+    if WRITE_BEHIND
+    else None
+)
@@ -0,0 +1,103 @@
+# Micro-benchmarks for the expression evaluator.
+#
+#   python benchmarks/bench_eval.py --output benchmarks/results/eval.json
+#   python benchmarks/bench_eval.py --compare benchmarks/results/eval.json
+#
+# Run from calculator-app/backend. Times are microseconds per call, best of
+# --repeat runs, for flat expressions of growing length and nested
+# expressions of growing depth.
+import argparse
+import ast
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.evaluator import (  # noqa: E402
+    NO_BINDINGS,
+    Evaluator,
+    compile_expression,
+    expression_cache,
+    preprocess_expression,
+    result_cache,
+    safe_eval,
+)
+from common import compare, metadata, write_results  # noqa: E402
+
+# Total functions only, so random nesting never raises a math domain error
+FUNCTIONS = ["sin", "cos", "fabs", "floor"]
+OPERATORS = ["+", "-", "x", "/"]
+
+def flat_expression(rng, terms):
+    parts = [str(rng.randint(1, 99))]
+    for _ in range(terms - 1):
+        parts.append(rng.choice(OPERATORS))
+        parts.append(str(rng.randint(1, 99)))
+    return " ".join(parts)
+
+def nested_expression(rng, depth):
+    expression = str(rng.randint(1, 9))
+    for _ in range(depth):
+        if rng.random() < 0.5:
+            expression = f"{rng.choice(FUNCTIONS)}({expression})"
+        else:
+            expression = f"({expression} {rng.choice(OPERATORS)} {rng.randint(1, 9)})"
+    return expression
+
+def time_call(func, number, repeat):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+def bench_expression(name, raw, number, repeat):
+    expression = preprocess_expression(raw)
+    tree = ast.parse(expression, mode="eval")
+    program = compile_expression(tree.body)
+
+    def cold():
+        expression_cache.clear()
+        result_cache.clear()
+        safe_eval(expression)
+
+    safe_eval(expression)
+    return {
+        "name": name,
+        "length": len(raw),
+        "nodes": sum(1 for _ in ast.walk(tree.body)),
+        "preprocess_us": time_call(lambda: preprocess_expression(raw), number, repeat),
+        "parse_us": time_call(lambda: ast.parse(expression, mode="eval"), number, repeat),
+        "evaluator_dispatch_us": time_call(lambda: Evaluator().visit(tree.body), number, repeat),
+        "compiled_program_us": time_call(lambda: program(NO_BINDINGS), number, repeat),
+        "safe_eval_cold_us": time_call(cold, number, repeat),
+        "safe_eval_warm_us": time_call(lambda: safe_eval(expression), number, repeat),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark safe_eval and friends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--number", type=int, default=200, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--metric", default="safe_eval_cold_us", help="metric used by --compare")
+    args = parser.parse_args()
+
+    if not hasattr(result_cache, "clear"):
+        parser.error("bench_eval needs RESULT_CACHE=memory or none")
+
+    rng = random.Random(args.seed)
+    cases = []
+    for size in args.sizes:
+        cases.append(bench_expression(f"flat/{size}", flat_expression(rng, size), args.number, args.repeat))
+    for depth in args.depths:
+        cases.append(bench_expression(f"nested/{depth}", nested_expression(rng, depth), args.number, args.repeat))
+
+    results = {"meta": metadata(benchmark="eval", seed=args.seed), "cases": cases}
+    write_results(results, args.output)
+    if args.compare:
+        compare(results, args.compare, args.metric)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# Startup-time benchmark for the calculator backend.
+#
+#   python benchmarks/bench_startup.py --output benchmarks/results/startup.json
+#   python benchmarks/bench_startup.py --cases import gunicorn --workers 4
+#
+# Run from calculator-app/backend. Every case starts fresh processes against a
+# migrated throwaway SQLite database (or --database-url) and reports the best
+# and median of --repeat runs, in milliseconds:
+#
+#   import              `import app.main` in a new interpreter
+#   uvicorn             spawn to first response, single uvicorn process
+#   gunicorn            spawn to every worker started, gunicorn.conf.py
+#   gunicorn_nopreload  the same with GUNICORN_PRELOAD=false
+#
+# Server cases also time the first database-backed request (first_query_ms),
+# which is where the engine is now created. The readiness probe doesn't touch
+# the database, so a server whose database is unreachable still starts.
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_api import free_port, migrate
+from common import BACKEND_DIR, compare, metadata, write_results
+
+CASES = ["import", "uvicorn", "gunicorn", "gunicorn_nopreload"]
+PROBE_PATH = "/stats/expression-cache"
+STARTUP_LINE = "Application startup complete"
+
+IMPORT_SCRIPT = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+def time_import(env):
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", IMPORT_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return {"ready_ms": float(output.strip().splitlines()[-1])}
+
+def server_command(name, port, workers):
+    if name == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                "--port", str(port), "--log-level", "info"]
+    return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "info"]
+
+def get(port, path, timeout=1):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+def wait_for_workers(process, expected, deadline):
+    # Every uvicorn worker logs this line once its lifespan startup is done
+    started = 0
+    for line in process.stderr:
+        if STARTUP_LINE in line:
+            started += 1
+            if started == expected:
+                return
+        if time.perf_counter() > deadline:
+            break
+    raise RuntimeError(f"only {started} of {expected} workers started")
+
+def time_server(name, env, workers, timeout=60):
+    port = free_port()
+    expected = 1 if name == "uvicorn" else workers
+    if name != "uvicorn":
+        env = {**env, "PROMETHEUS_MULTIPROC_DIR": os.path.join(env["BENCH_TMP"], "metrics")}
+    if name == "gunicorn_nopreload":
+        env = {**env, "GUNICORN_PRELOAD": "false"}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        server_command(name, port, workers), cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        deadline = started + timeout
+        wait_for_workers(process, expected, deadline)
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{name}: server exited with {process.returncode}")
+            try:
+                if get(port, PROBE_PATH) == 200:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{name}: not ready after {timeout}s")
+            time.sleep(0.002)
+        ready = time.perf_counter() - started
+
+        query_started = time.perf_counter()
+        status = get(port, "/history?limit=1", timeout=30)
+        first_query = time.perf_counter() - query_started
+        if status != 200:
+            raise RuntimeError(f"{name}: /history returned {status}")
+        return {"ready_ms": ready * 1000, "first_query_ms": first_query * 1000}
+    finally:
+        process.terminate()
+        process.communicate()
+
+def summarize(name, runs):
+    summary = {"name": name, "runs": len(runs)}
+    for metric in runs[0]:
+        values = [run[metric] for run in runs]
+        summary[f"best_{metric}"] = min(values)
+        summary[f"median_{metric}"] = statistics.median(values)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure calculator backend startup time")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--database-url", help="database to start against (default: temporary SQLite)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="gunicorn workers")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--metric", default="median_ready_ms", help="metric used by --compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = {**os.environ, "DATABASE_URL": database_url, "BENCH_TMP": tmp}
+        migrate(env)
+        cases = []
+        for name in args.cases:
+            if name == "import":
+                runs = [time_import(env) for _ in range(args.repeat)]
+            else:
+                runs = [time_server(name, env, args.workers) for _ in range(args.repeat)]
+            cases.append(summarize(name, runs))
+
+    results = {
+        "meta": metadata(
+            benchmark="startup",
+            database=None if args.database_url is None else args.database_url.split(":", 1)[0],
+            workers=args.workers,
+        ),
+        "cases": cases,
+    }
+    write_results(results, args.output)
+    if args.compare:
+        compare(results, args.compare, args.metric)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def latency_summary(latencies, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "rps": len(ordered) / elapsed if elapsed else None,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else None,
+        "p50_ms": percentile(ordered, 0.50) * 1000 if ordered else None,
+        "p95_ms": percentile(ordered, 0.95) * 1000 if ordered else None,
+        "p99_ms": percentile(ordered, 0.99) * 1000 if ordered else None,
+        "max_ms": ordered[-1] * 1000 if ordered else None,
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def metadata(**extra):
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        **extra,
+    }
+
+def write_results(results, output):
+    text = json.dumps(results, indent=2)
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        print(f"Results written to {output}")
+    else:
+        print(text)
+
+def compare(results, baseline_path, metric):
+    # Prints current/baseline ratios for every case present in both files;
+    # > 1.0 means slower than the baseline
+    with open(baseline_path) as f:
+        baseline = {case["name"]: case for case in json.load(f)["cases"]}
+    print(f"\n{'case':<50} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for case in results["cases"]:
+        before = baseline.get(case["name"], {}).get(metric)
+        after = case.get(metric)
+        if before and after:
+            print(f"{case['name']:<50} {before:>12.3f} {after:>12.3f} {after / before:>8.2f}")
@@ -0,0 +1,49 @@
+# Production profile for the backend:
+#
+#   python -m app.migrate
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app is imported once in the master (preload_app) and the workers are
+# forked from it, so a new or replacement worker serves within milliseconds
+# instead of importing FastAPI, SQLAlchemy and NumPy again. Database engines
+# are created lazily inside each worker (app/database.py) and the schema is
+# created by the separate migrate step, so nothing connects to the database
+# before the first request.
+import os
+import shutil
+import tempfile
+
+from dotenv import load_dotenv
+
+# The app reads its settings from the environment at import, so a .env file is
+# loaded here, before the app is
+load_dotenv()
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+worker_class = "uvicorn.workers.UvicornWorker"
+# One event loop per core. Every worker has its own pool of up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections; keep the product under the
+# database's max_connections.
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+
+# /metrics has to merge the samples of all workers. The directory must be
+# set before the app imports prometheus_client, which this file runs ahead of.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "calculator-metrics")
+)
+
+def on_starting(server):
+    # Drop samples left behind by a previous run
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read from the environment, so they are pinned before the app
+# is imported: a throwaway SQLite database and the in-process caches
+TMP_DIR = tempfile.mkdtemp(prefix="calculator-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'calculator.db')}"
+os.environ["RESULT_CACHE"] = "memory"
+os.environ["WRITE_BEHIND"] = "false"
+os.environ["WRITE_BEHIND_SPILL_PATH"] = os.path.join(TMP_DIR, "write-behind.jsonl")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.migrate import migrate
+
+    migrate()
+    with TestClient(app) as client:
+        yield client
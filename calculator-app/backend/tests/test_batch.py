@@ -0,0 +1,53 @@
+import pytest
+
+from app import batch
+from app.batch import evaluate_bindings
+
+
+def test_bindings_are_vectorized():
+    results = evaluate_bindings("x * y + 1", {"x": [1.0, 2.0, 3.0], "y": [2.0, 2.0, 0.5]})
+    assert results == [
+        ("x * y + 1 [x=1.0, y=2.0]", "3.0", None),
+        ("x * y + 1 [x=2.0, y=2.0]", "5.0", None),
+        ("x * y + 1 [x=3.0, y=0.5]", "2.5", None),
+    ]
+
+
+def test_failing_rows_fall_back_to_scalar_evaluation():
+    results = evaluate_bindings("1 / x", {"x": [2.0, 0.0, 4.0]})
+    assert [result for _, result, _ in results] == ["0.5", None, "0.25"]
+    assert results[1][2].startswith("Invalid expression or operation")
+
+    results = evaluate_bindings("log(x)", {"x": [1.0, -1.0]})
+    assert results[0][1] == "0.0"
+    assert results[1][1] is None and results[1][2] == "math domain error"
+
+
+def test_integer_functions_are_evaluated_per_row():
+    # ceil has no NumPy counterpart here, so results are ints as in /calculate
+    results = evaluate_bindings("ceil(x)", {"x": [1.2, -1.5]})
+    assert [result for _, result, _ in results] == ["2", "-1"]
+
+
+def test_vectorized_and_scalar_results_agree(monkeypatch):
+    variables = {"x": [0.5, 1.5, 2.5]}
+    vectorized = evaluate_bindings("sqrt(x) + sin(x) * exp(x)", variables)
+    monkeypatch.setattr(batch, "_evaluate_vectorized", lambda *args: None)
+    scalar = evaluate_bindings("sqrt(x) + sin(x) * exp(x)", variables)
+    for (_, vector_value, _), (_, scalar_value, _) in zip(vectorized, scalar):
+        assert float(vector_value) == pytest.approx(float(scalar_value))
+
+
+@pytest.mark.parametrize("variables, message", [
+    ({"x": [1.0], "y": [1.0, 2.0]}, "same number of values"),
+    ({"sin": [1.0]}, "Invalid variable name"),
+])
+def test_invalid_bindings(variables, message):
+    with pytest.raises(ValueError, match=message):
+        evaluate_bindings("x + 1", variables)
+
+
+def test_batch_size_is_limited(monkeypatch):
+    monkeypatch.setattr(batch, "MAX_BATCH_SIZE", 2)
+    with pytest.raises(ValueError, match="Batch too large"):
+        evaluate_bindings("x", {"x": [1.0, 2.0, 3.0]})
@@ -0,0 +1,51 @@
+import pytest
+
+from app.evaluator import NESTED_TOO_DEEPLY, ExpressionCache, preprocess_expression, safe_eval
+
+DEEP = "1" + "+1" * 100000
+
+
+def test_cache_hits_by_text_then_by_structure():
+    cache = ExpressionCache(maxsize=8)
+    key, program = cache.get("2+3")
+    assert program({}) == 5
+    assert cache.get("2+3") == (key, program)
+    # Same AST, different spelling: shares the compiled program
+    assert cache.get("2 + 3") == (key, program)
+    assert cache.stats() == {"size": 2, "maxsize": 8, "hits": 1, "structural_hits": 1, "misses": 1}
+
+
+def test_cache_is_bounded():
+    cache = ExpressionCache(maxsize=2)
+    for expression in ("1+1", "2+2", "3+3"):
+        cache.get(expression)
+    cache.get("1+1")
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["misses"] == 4
+
+
+def test_x_multiplies_only_outside_names():
+    assert preprocess_expression("2x3") == "2*3"
+    assert preprocess_expression("exp(1) x 2") == "exp(1) * 2"
+
+
+def test_deeply_nested_expression_is_a_value_error():
+    with pytest.raises(ValueError, match=NESTED_TOO_DEEPLY):
+        safe_eval(DEEP)
+
+
+def test_deeply_nested_expression_is_a_400(client):
+    response = client.post("/calculate", json={"expression": DEEP})
+    assert response.status_code == 400
+    assert response.json()["detail"] == NESTED_TOO_DEEPLY
+
+    response = client.post("/calculate/batch", json={"expressions": ["1+1", DEEP]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["result"] == "2" and results[1]["error"] == NESTED_TOO_DEEPLY
+
+
+def test_calculate_stores_the_result(client):
+    response = client.post("/calculate", json={"expression": "6 x 7"})
+    assert response.status_code == 200
+    assert response.json()["result"] == "42"
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.history import decode_cursor, encode_cursor, history_query
+
+T0 = datetime(2024, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+def add_rows(db, timestamps):
+    db.add_all(
+        models.Calculation(expression=f"{i}+0", result=str(i), timestamp=timestamp)
+        for i, timestamp in enumerate(timestamps)
+    )
+    db.commit()
+
+
+def pages(db, limit):
+    cursor = None
+    while True:
+        page = db.execute(history_query(cursor, limit)).scalars().all()
+        if not page:
+            return
+        yield [row.id for row in page]
+        cursor = encode_cursor(page[-1])
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(SimpleNamespace(timestamp=timestamp, id=42))
+    assert decode_cursor(cursor) == (timestamp, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm8tc2VwYXJhdG9y", "MjAyNHwx"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_pages_are_newest_first_without_gaps(db):
+    add_rows(db, [T0 + timedelta(seconds=i) for i in range(7)])
+    assert list(pages(db, 3)) == [[7, 6, 5], [4, 3, 2], [1]]
+
+
+def test_equal_timestamps_are_ordered_by_id(db):
+    # A page boundary inside a run of equal timestamps neither repeats nor
+    # skips rows
+    add_rows(db, [T0, T0, T0, T0, T0 - timedelta(seconds=1), T0 + timedelta(seconds=1)])
+    assert list(pages(db, 2)) == [[6, 4], [3, 2], [1, 5]]
+
+
+def test_history_endpoint_pages_with_next_cursor(client):
+    for i in range(3):
+        assert client.post("/calculate", json={"expression": f"{i}+100"}).status_code == 200
+    first = client.get("/history", params={"limit": 2})
+    assert len(first.json()) == 2
+    second = client.get("/history", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    first_ids = {row["id"] for row in first.json()}
+    assert second.json() and not first_ids & {row["id"] for row in second.json()}
+    assert client.get("/history", params={"cursor": "bogus"}).status_code == 400
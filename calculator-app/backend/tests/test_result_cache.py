@@ -0,0 +1,141 @@
+import fnmatch
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.result_cache import InMemoryResultCache, NullResultCache, RedisResultCache, create_result_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedisError(Exception):
+    pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.failing = False
+        self.deletes = []
+
+    def _check(self):
+        if self.failing:
+            raise FakeRedisError("connection refused")
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value.encode()
+        self.expiry[key] = ex
+
+    def scan_iter(self, match=None, count=None):
+        self._check()
+        return iter([key for key in list(self.data) if fnmatch.fnmatch(key, match)])
+
+    def delete(self, *keys):
+        self._check()
+        self.deletes.append(len(keys))
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = FakeRedis()
+    module = SimpleNamespace(RedisError=FakeRedisError, Redis=SimpleNamespace(from_url=lambda url: client))
+    monkeypatch.setitem(sys.modules, "redis", module)
+    return client
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = InMemoryResultCache(maxsize=8, ttl=60, clock=clock)
+    cache.set("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"], stats["size"]) == (1, 1, 1, 0)
+
+
+def test_set_refreshes_ttl():
+    clock = Clock()
+    cache = InMemoryResultCache(ttl=60, clock=clock)
+    cache.set("a", 1)
+    clock.now += 50
+    cache.set("a", 2)
+    clock.now += 50
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = InMemoryResultCache(maxsize=2, clock=Clock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_clear_empties_and_resets_counters():
+    cache = InMemoryResultCache(clock=Clock())
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 0
+
+
+def test_redis_round_trips_result_types(redis_client):
+    cache = RedisResultCache("redis://test", ttl=30)
+    for key, value in (("int", 2 ** 70), ("float", 0.1), ("complex", 1 + 2j)):
+        cache.set(key, value)
+        result = cache.get(key)
+        assert result == value and type(result) is type(value)
+    assert set(redis_client.expiry.values()) == {30}
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_redis_errors_count_as_misses(redis_client):
+    cache = RedisResultCache("redis://test")
+    redis_client.failing = True
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["errors"] == 2
+
+
+def test_redis_clear_deletes_only_its_prefix_in_batches(redis_client):
+    cache = RedisResultCache("redis://test")
+    for i in range(1203):
+        cache.set(str(i), i)
+    redis_client.data["other:key"] = b"1"
+    cache.get("0")
+    cache.clear()
+    assert list(redis_client.data) == ["other:key"]
+    assert redis_client.deletes == [500, 500, 203]
+    assert cache.stats()["hits"] == 0
+
+    redis_client.failing = True
+    cache.clear()
+    assert cache.stats()["errors"] == 1
+
+
+def test_backend_is_chosen_by_name():
+    assert isinstance(create_result_cache("memory"), InMemoryResultCache)
+    assert isinstance(create_result_cache("none"), NullResultCache)
+    with pytest.raises(ValueError, match="Unknown RESULT_CACHE backend"):
+        create_result_cache("memcached")
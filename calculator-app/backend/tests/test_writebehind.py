@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.writebehind import WriteBehindBuffer, WriteBehindUnavailable
+
+
+class Database:
+    # Session factory that can be taken down like an unreachable server
+    def __init__(self, path):
+        self.engine = create_engine(f"sqlite:///{path}")
+        models.Base.metadata.create_all(self.engine)
+        self.sessions = sessionmaker(bind=self.engine)
+        self.down = False
+
+    def __call__(self):
+        if self.down:
+            raise ConnectionError("database is down")
+        return self.sessions()
+
+    def count(self, model):
+        with self.sessions() as db:
+            return db.scalar(select(func.count()).select_from(model))
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(tmp_path / "calculator.db")
+    yield database
+    database.engine.dispose()
+
+
+def make_buffer(database, spill_path, **options):
+    options = {"flush_interval": 0.01, "retries": 1, "retry_backoff": 0, "spill_path": str(spill_path), **options}
+    return WriteBehindBuffer(database, **options)
+
+
+def test_rows_are_written_in_batches(database, tmp_path):
+    buffer = make_buffer(database, tmp_path / "spill.jsonl", batch_size=2)
+    buffer.start()
+    for i in range(5):
+        buffer.enqueue(f"{i}x2", str(i * 2))
+    buffer.stop()
+    stats = buffer.stats()
+    assert stats["rows_written"] == 5 and stats["pending_rows"] == 0
+    assert database.count(models.Calculation) == 5
+    assert database.count(models.ExpressionTotal) == 5
+
+
+def test_failed_batches_spill_and_are_replayed(database, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    database.down = True
+    buffer = make_buffer(database, spill_path)
+    buffer.start()
+    for i in range(3):
+        buffer.enqueue(f"{i}+1", str(i + 1))
+    buffer.stop()
+    stats = buffer.stats()
+    assert stats["rows_spilled"] == 3 and stats["rows_written"] == 0
+    assert stats["rows_retried"] == 3
+    assert "database is down" in stats["last_error"]
+    assert len(spill_path.read_text().splitlines()) == 3
+
+    # The next flush thread writes the spilled rows before anything new
+    database.down = False
+    buffer = make_buffer(database, spill_path)
+    buffer.start()
+    buffer.stop()
+    assert buffer.stats()["rows_replayed"] == 3
+    assert database.count(models.Calculation) == 3
+    # Neither the spill file nor the renamed replay copy is left behind
+    assert not list(tmp_path.glob("spill.jsonl*"))
+
+
+def test_replay_that_fails_spills_again(database, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    spill_path.write_text('{"expression": "1+1", "result": "2", "timestamp": "2024-01-01T00:00:00+00:00"}\n')
+    database.down = True
+    buffer = make_buffer(database, spill_path)
+    buffer.start()
+    buffer.stop()
+    assert buffer.stats()["rows_replayed"] == 0
+    assert len(spill_path.read_text().splitlines()) == 1
+    assert database.count(models.Calculation) == 0
+
+
+def test_enqueue_refuses_rows_when_stopped_or_full(database, tmp_path):
+    buffer = make_buffer(database, tmp_path / "spill.jsonl", max_queue=1)
+    with pytest.raises(WriteBehindUnavailable, match="not running"):
+        buffer.enqueue("1+1", "2")
+    # Open for rows but without a flush thread, so the queue fills up
+    buffer._closed = False
+    buffer.enqueue("1+1", "2")
+    with pytest.raises(WriteBehindUnavailable, match="full"):
+        buffer.enqueue("2+2", "4")
@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "jira-export",
+    "issues.sqlite3",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    key TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    project TEXT NOT NULL,
+    summary TEXT,
+    status TEXT,
+    assignee TEXT,
+    priority TEXT,
+    issuetype TEXT,
+    created TEXT,
+    updated TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_issues_project_created ON issues (project, created);
+CREATE INDEX IF NOT EXISTS ix_issues_project_status ON issues (project, status);
+CREATE TABLE IF NOT EXISTS details (
+    project TEXT NOT NULL,
+    type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (project, type, id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    project TEXT PRIMARY KEY,
+    high_water TEXT,
+    synced_at REAL NOT NULL
+);
+"""
+
+ISSUE_COLUMNS = ["key", "id", "project", "summary", "status", "assignee", "priority", "issuetype", "created", "updated"]
+
+UPSERT_ISSUE = (
+    f"INSERT INTO issues ({', '.join(ISSUE_COLUMNS)}, record) "
+    f"VALUES ({', '.join('?' * (len(ISSUE_COLUMNS) + 1))}) "
+    "ON CONFLICT (key) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in ISSUE_COLUMNS[1:] + ["record"])
+)
+
+
+class IssueStore:
+    # Local copy of Jira issue records (the dicts issue_record() builds) plus
+    # the project, its components and versions, so reports and exports can be
+    # answered without the server. sync_state keeps each project's high-water
+    # mark: the server time at which its last clean sync started.
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def upsert_issues(self, project, records):
+        rows = [
+            tuple(record.get(column) for column in ISSUE_COLUMNS[:2])
+            + (project,)
+            + tuple(record.get(column) for column in ISSUE_COLUMNS[3:])
+            + (json.dumps(record),)
+            for record in records
+        ]
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(UPSERT_ISSUE, rows)
+        return len(rows)
+
+    def delete_missing(self, project, keys):
+        # After a full sync, drops issues that were deleted or moved away
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM seen")
+            self.conn.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)", ((key,) for key in keys))
+            deleted = self.conn.execute(
+                "DELETE FROM issues WHERE project = ? AND key NOT IN (SELECT key FROM seen)", (project,)
+            ).rowcount
+            self.conn.execute("DELETE FROM seen")
+        return deleted
+
+    def replace_details(self, project, type_, records):
+        # The project ("project"), its components and versions are small, so
+        # they are replaced wholesale on every sync
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM details WHERE project = ? AND type = ?", (project, type_))
+            self.conn.executemany(
+                "INSERT INTO details (project, type, id, record) VALUES (?, ?, ?, ?)",
+                ((project, type_, record["id"], json.dumps(record)) for record in records),
+            )
+
+    def details(self, project, type_):
+        rows = self.conn.execute(
+            "SELECT record FROM details WHERE project = ? AND type = ? ORDER BY rowid", (project, type_)
+        )
+        return [json.loads(record) for record, in rows]
+
+    def high_water(self, project):
+        row = self.conn.execute("SELECT high_water FROM sync_state WHERE project = ?", (project,)).fetchone()
+        return row[0] if row else None
+
+    def set_high_water(self, project, high_water):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (project, high_water, synced_at) VALUES (?, ?, ?)",
+            (project, high_water, time.time()),
+        )
+
+    def issues(self, project, status=None, assignee=None, component=None, text=None):
+        query = "SELECT record FROM issues WHERE project = ?"
+        params = [project]
+        if status:
+            query += " AND status = ? COLLATE NOCASE"
+            params.append(status)
+        if assignee:
+            query += " AND assignee = ? COLLATE NOCASE"
+            params.append(assignee)
+        if text:
+            query += " AND summary LIKE ?"
+            params.append(f"%{text}%")
+        query += " ORDER BY created DESC, key DESC"
+        for record, in self.conn.execute(query, params):
+            record = json.loads(record)
+            if component and component.lower() not in (name.lower() for name in record["components"]):
+                continue
+            yield record
+
+    def counts(self, project, column="status"):
+        if column not in ISSUE_COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+        rows = self.conn.execute(
+            f"SELECT {column}, COUNT(*) FROM issues WHERE project = ? GROUP BY {column} ORDER BY COUNT(*) DESC",
+            (project,),
+        )
+        return dict(rows.fetchall())
+
+    def stats(self, project):
+        count = self.conn.execute("SELECT COUNT(*) FROM issues WHERE project = ?", (project,)).fetchone()[0]
+        row = self.conn.execute(
+            "SELECT high_water, synced_at FROM sync_state WHERE project = ?", (project,)
+        ).fetchone()
+        return {
+            "path": self.path,
+            "project": project,
+            "issues": count,
+            "high_water": row[0] if row else None,
+            "synced_at": row[1] if row else None,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -1,41 +1,408 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from jira import JIRA
 from jira.exceptions import JIRAError
+from requests.adapters import HTTPAdapter
+
+from jiraStore import DEFAULT_STORE_PATH, IssueStore
+
+# Jira credentials and server, e.g. JIRA_SERVER=http://localhost:8080 for a
+# local mock
+JIRA_SERVER = os.environ.get("JIRA_SERVER", "")
+EMAIL = os.environ.get("JIRA_EMAIL", "")
+API_TOKEN = os.environ.get("JIRA_API_TOKEN", "")
+JIRA_VERIFY = os.environ.get("JIRA_VERIFY", "false").lower() in ("1", "true", "yes")
+
+PROJECT_KEY = os.environ.get("JIRA_PROJECT", "KAN")  # Replace with your project key
+PAGE_SIZE = int(os.environ.get("JIRA_PAGE_SIZE", "100"))
+MAX_WORKERS = int(os.environ.get("JIRA_MAX_WORKERS", "4"))
+# 429 and 503 responses are retried with exponential backoff (honouring
+# Retry-After) by the jira session, up to this many times
+MAX_RETRIES = int(os.environ.get("JIRA_MAX_RETRIES", "5"))
+MAX_RETRY_DELAY = int(os.environ.get("JIRA_MAX_RETRY_DELAY", "60"))
+TIMEOUT = float(os.environ.get("JIRA_TIMEOUT", "30"))
+STORE_PATH = os.environ.get("JIRA_STORE", DEFAULT_STORE_PATH)
+
+JIRA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+# JQL dates only have minute precision, so incremental syncs overlap the
+# previous one a little; upserts make the repeats harmless
+SYNC_OVERLAP = timedelta(minutes=1)
+
+# Only these fields are requested, instead of every field on every issue
+ISSUE_FIELDS = [
+    "summary",
+    "status",
+    "assignee",
+    "priority",
+    "issuetype",
+    "created",
+    "updated",
+    "components",
+    "fixVersions",
+]
+
+
+def connect(workers=MAX_WORKERS):
+    if not (JIRA_SERVER and EMAIL and API_TOKEN):
+        print("Set JIRA_SERVER, JIRA_EMAIL and JIRA_API_TOKEN.")
+        sys.exit(1)
+    options = {'server': JIRA_SERVER, 'verify': JIRA_VERIFY}
+    try:
+        jira = JIRA(options=options, basic_auth=(EMAIL, API_TOKEN), max_retries=MAX_RETRIES, timeout=TIMEOUT)
+        # One keep-alive connection per concurrent request instead of
+        # requests' default pool of 10, which drops the extras after use
+        jira._session.max_retry_delay = MAX_RETRY_DELAY
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers + 2)
+        jira._session.mount("https://", adapter)
+        jira._session.mount("http://", adapter)
+        user = jira.current_user()
+        print(f"Credentials are valid. Logged in as: {user}", file=sys.stderr)
+    except JIRAError as e:
+        print(f"Failed to authenticate: {e.text}")
+        sys.exit(1)
+    return jira
+
+
+def _name(value, key="name"):
+    return value.get(key) if value else None
+
+
+def issue_record(raw):
+    fields = raw.get("fields", {})
+    return {
+        "type": "issue",
+        "id": raw["id"],
+        "key": raw["key"],
+        "summary": fields.get("summary"),
+        "status": _name(fields.get("status")),
+        "assignee": _name(fields.get("assignee"), "displayName"),
+        "priority": _name(fields.get("priority")),
+        "issuetype": _name(fields.get("issuetype")),
+        "created": fields.get("created"),
+        "updated": fields.get("updated"),
+        "components": [c["name"] for c in fields.get("components") or []],
+        "fixVersions": [v["name"] for v in fields.get("fixVersions") or []],
+    }
+
+
+def project_record(project):
+    raw = project.raw
+    return {
+        "type": "project",
+        "id": raw["id"],
+        "key": raw["key"],
+        "name": raw.get("name"),
+        "description": raw.get("description"),
+        "lead": _name(raw.get("lead"), "displayName"),
+        "projectTypeKey": raw.get("projectTypeKey"),
+        "url": raw.get("self"),
+    }
+
+
+def component_record(component):
+    raw = component.raw
+    return {"type": "component", "id": raw["id"], "name": raw["name"], "description": raw.get("description")}
+
+
+def version_record(version):
+    raw = version.raw
+    return {
+        "type": "version",
+        "id": raw["id"],
+        "name": raw["name"],
+        "released": raw.get("released", False),
+        "releaseDate": raw.get("releaseDate"),
+    }
+
+
+def _search_page(jira, jql, start_at, page_size):
+    return jira.search_issues(
+        jql, startAt=start_at, maxResults=page_size, fields=list(ISSUE_FIELDS), json_result=True
+    )
+
+
+def iter_issue_pages(jira, jql, executor, page_size=PAGE_SIZE, workers=MAX_WORKERS):
+    # Returns an iterator of lists of raw issues in result order. The first
+    # request is sent right away, so it overlaps whatever the caller does
+    # before iterating.
+    fields = list(ISSUE_FIELDS)
+    if getattr(jira, "deploymentType", None) == "Cloud":
+        first = executor.submit(
+            jira.enhanced_search_issues, jql, maxResults=page_size, fields=fields, json_result=True
+        )
+        return _token_pages(jira, jql, executor, first, page_size)
+    first = executor.submit(_search_page, jira, jql, 0, page_size)
+    return _offset_pages(jira, jql, executor, first, page_size, workers)
+
+
+def _token_pages(jira, jql, executor, future, page_size):
+    # Jira Cloud only pages by token, so pages can't be requested out of
+    # order; the next one is fetched while the current one is consumed
+    while future is not None:
+        page = future.result()
+        token = page.get("nextPageToken")
+        future = token and executor.submit(
+            jira.enhanced_search_issues,
+            jql,
+            nextPageToken=token,
+            maxResults=page_size,
+            fields=list(ISSUE_FIELDS),
+            json_result=True,
+        )
+        yield page.get("issues", [])
+
+
+def _offset_pages(jira, jql, executor, first, page_size, workers):
+    # The first page gives the total; the remaining offsets are fetched
+    # concurrently, keeping at most 2 x workers pages in flight so a slow
+    # consumer doesn't buffer the whole project
+    first = first.result()
+    yield first["issues"]
+    # The server may cap maxResults below what was asked for
+    step = first.get("maxResults") or page_size
+    offsets = iter(range(len(first["issues"]), first.get("total", 0), step))
+    in_flight = deque()
+    for start_at in offsets:
+        in_flight.append(executor.submit(_search_page, jira, jql, start_at, step))
+        if len(in_flight) >= 2 * workers:
+            break
+    while in_flight:
+        page = in_flight.popleft().result()
+        start_at = next(offsets, None)
+        if start_at is not None:
+            in_flight.append(executor.submit(_search_page, jira, jql, start_at, step))
+        yield page["issues"]
+
+
+def project_jql(project_key):
+    return f"project = {project_key} ORDER BY created DESC, key DESC"
+
+
+def parse_jira_time(value):
+    return datetime.strptime(value, JIRA_TIME_FORMAT)
+
+
+def user_zone(jira):
+    # JQL dates are read in the searching user's time zone
+    try:
+        return ZoneInfo(jira.myself().get("timeZone") or "UTC")
+    except ZoneInfoNotFoundError:
+        return timezone.utc
+
+
+def changed_jql(project_key, since, zone):
+    # Key order keeps offsets stable while issues are edited mid-sync
+    since = (datetime.fromisoformat(since) - SYNC_OVERLAP).astimezone(zone)
+    return f'project = {project_key} AND updated >= "{since:%Y/%m/%d %H:%M}" ORDER BY key ASC'
+
+
+def sync_project(jira, store, project_key, full=False, page_size=PAGE_SIZE, workers=MAX_WORKERS):
+    # Fetches the issues updated since the project's high-water mark (all of
+    # them on the first run or with full=True) and upserts them into store.
+    # The new mark is always the server time the sync started at: an issue
+    # edited during the sync has a later "updated", so the next sync fetches
+    # it again (SYNC_OVERLAP covers clock rounding) and the upsert replaces
+    # the copy read here. Such edits can shift offsets under the paging, so
+    # they are reported as complete=False, and a full sync then leaves
+    # deletions for the next clean full listing.
+    with ThreadPoolExecutor(max_workers=workers + 2) as executor:
+        server_info = executor.submit(jira.server_info)
+        zone = executor.submit(user_zone, jira)
+        project = executor.submit(jira.project, project_key)
+        components = executor.submit(jira.project_components, project_key)
+        versions = executor.submit(jira.project_versions, project_key)
+
+        started = parse_jira_time(server_info.result()["serverTime"])
+        since = None if full else store.high_water(project_key)
+        if since is None:
+            jql = f"project = {project_key} ORDER BY key ASC"
+        else:
+            jql = changed_jql(project_key, since, zone.result())
+
+        keys = []
+        shifted = False
+        for issues in iter_issue_pages(jira, jql, executor, page_size, workers):
+            records = [issue_record(raw) for raw in issues]
+            store.upsert_issues(project_key, records)
+            keys.extend(record["key"] for record in records)
+            shifted = shifted or any(
+                record["updated"] and parse_jira_time(record["updated"]) >= started for record in records
+            )
+
+        store.replace_details(project_key, "project", [project_record(project.result())])
+        store.replace_details(project_key, "component", [component_record(c) for c in components.result()])
+        store.replace_details(project_key, "version", [version_record(v) for v in versions.result()])
+
+    deleted = 0
+    if since is None and not shifted:
+        # Only a full listing shows deletions and moves to other projects
+        deleted = store.delete_missing(project_key, keys)
+    store.set_high_water(project_key, started.isoformat())
+    return {"fetched": len(keys), "deleted": deleted, "full": since is None, "complete": not shifted}
+
+
+def write_records(out, *groups):
+    count = 0
+    for records in groups:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+            count += record["type"] == "issue"
+    return count
+
+
+def export_project(jira, project_key, out, page_size=PAGE_SIZE, workers=MAX_WORKERS):
+    # Streams one JSON object per line: every issue, followed by components
+    # and versions (fetched in parallel with the issue search)
+    with ThreadPoolExecutor(max_workers=workers + 2) as executor:
+        components = executor.submit(jira.project_components, project_key)
+        versions = executor.submit(jira.project_versions, project_key)
+        pages = iter_issue_pages(jira, project_jql(project_key), executor, page_size, workers)
+        return write_records(
+            out,
+            (issue_record(raw) for issues in pages for raw in issues),
+            (component_record(component) for component in components.result()),
+            (version_record(version) for version in versions.result()),
+        )
+
+
+def export_local(store, project_key, out, **filters):
+    return write_records(
+        out,
+        store.issues(project_key, **filters),
+        store.details(project_key, "component"),
+        store.details(project_key, "version"),
+    )
+
+
+def print_overview(project, components, versions, issues):
+    print(f"Project: {project['key']} - {project['name']}")
+    print(f"Description: {project['description']}")
+    print(f"Lead: {project['lead']}")
+    print(f"Project Type: {project['projectTypeKey']}")
+    print(f"URL: {project['url']}")
+
+    # Print components
+    print("\nComponents:")
+    for comp in components:
+        print(f"  - {comp['name']}: {comp['description']}")
+
+    # Print versions
+    print("\nVersions:")
+    for ver in versions:
+        print(f"  - {ver['name']} (Released: {ver['released']})")
+
+    print("\nIssues:")
+    for issue in issues:
+        print(f"  - Key: {issue['key']}, Summary: {issue['summary']}, Status: {issue['status']}")
+
+
+def print_project(jira, project_key, page_size=PAGE_SIZE, workers=MAX_WORKERS):
+    with ThreadPoolExecutor(max_workers=workers + 2) as executor:
+        project = executor.submit(jira.project, project_key)
+        components = executor.submit(jira.project_components, project_key)
+        versions = executor.submit(jira.project_versions, project_key)
+        pages = iter_issue_pages(jira, project_jql(project_key), executor, page_size, workers)
+        print_overview(
+            project_record(project.result()),
+            (component_record(component) for component in components.result()),
+            (version_record(version) for version in versions.result()),
+            (issue_record(raw) for issues in pages for raw in issues),
+        )
+
+
+def print_local(store, project_key, **filters):
+    project = store.details(project_key, "project")
+    if not project:
+        print(f"{project_key} has not been synced to {store.path}; run with --sync first.")
+        return 1
+    print_overview(
+        project[0],
+        store.details(project_key, "component"),
+        store.details(project_key, "version"),
+        store.issues(project_key, **filters),
+    )
+    print("\nBy status (all stored issues):")
+    for status, count in store.counts(project_key, "status").items():
+        print(f"  - {status}: {count}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show, export or sync a Jira project")
+    parser.add_argument("--project", default=PROJECT_KEY)
+    parser.add_argument("--export", metavar="PATH", help="write JSON lines here ('-' for stdout)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="concurrent search requests")
+    parser.add_argument("--store", default=STORE_PATH, help="local SQLite issue store")
+    parser.add_argument("--sync", action="store_true", help="fetch issues changed since the last sync into the store")
+    parser.add_argument("--full", action="store_true", help="with --sync, refetch every issue and drop deleted ones")
+    parser.add_argument("--local", action="store_true", help="answer from the store without contacting Jira")
+    local = parser.add_argument_group("filters for --local")
+    local.add_argument("--status")
+    local.add_argument("--assignee")
+    local.add_argument("--component")
+    local.add_argument("--text", help="substring of the summary")
+    args = parser.parse_args(argv)
+    filters = {"status": args.status, "assignee": args.assignee, "component": args.component, "text": args.text}
+    if any(filters.values()) and not args.local:
+        parser.error("filters only apply with --local")
+
+    if args.local:
+        store = IssueStore(args.store)
+        try:
+            if not args.export:
+                return print_local(store, args.project, **filters)
+            out = sys.stdout if args.export == "-" else open(args.export, "w", encoding="utf-8")
+            try:
+                count = export_local(store, args.project, out, **filters)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+        finally:
+            store.close()
+        print(f"Exported {count} issues from the local copy of {args.project}.", file=sys.stderr)
+        return 0
+
+    jira = connect(args.workers)
+    if args.sync:
+        store = IssueStore(args.store)
+        try:
+            result = sync_project(jira, store, args.project, args.full, args.page_size, args.workers)
+            stats = store.stats(args.project)
+        finally:
+            store.close()
+        kind = "Full" if result["full"] else "Incremental"
+        print(
+            f"{kind} sync of {args.project}: {result['fetched']} fetched, {result['deleted']} deleted, "
+            f"{stats['issues']} stored in {stats['path']}.",
+            file=sys.stderr,
+        )
+        if not result["complete"]:
+            print(
+                "Issues changed during the sync; the next sync fetches them again"
+                + (" and a later full sync applies deletions." if result["full"] else "."),
+                file=sys.stderr,
+            )
+        return 0
+    if not args.export:
+        print_project(jira, args.project, args.page_size, args.workers)
+        return 0
+    out = sys.stdout if args.export == "-" else open(args.export, "w", encoding="utf-8")
+    try:
+        count = export_project(jira, args.project, out, args.page_size, args.workers)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Exported {count} issues from {args.project}.", file=sys.stderr)
+    return 0
+
 
-# Jira credentials and server
-
-# Connect to Jira
-options = {'server': JIRA_SERVER, 'verify': False}
-try:
-    jira = JIRA(options=options, basic_auth=(EMAIL, API_TOKEN))
-    user = jira.current_user()
-    print(f"Credentials are valid. Logged in as: {user}")
-except JIRAError as e:
-    print(f"Failed to authenticate: {e.text}")
-    exit(1)
-
-PROJECT_KEY = "KAN"  # Replace with your project key
-
-project = jira.project(PROJECT_KEY)
-print(f"Project: {project.key} - {project.name}")
-print(f"Description: {project.description}")
-print(f"Lead: {project.lead.displayName}")
-print(f"Project Type: {project.projectTypeKey}")
-print(f"URL: {project.self}")
-
-# Print components
-components = jira.project_components(PROJECT_KEY)
-print("\nComponents:")
-for comp in components:
-    print(f"  - {comp.name}: {comp.description}")
-
-# Print versions
-versions = jira.project_versions(PROJECT_KEY)
-print("\nVersions:")
-for ver in versions:
-    print(f"  - {ver.name} (Released: {ver.released})")
-
-# Print issues (as before)
-print("\nIssues:")
-issues = jira.search_issues(f"project = {PROJECT_KEY} ORDER BY created DESC", maxResults=50)
-for issue in issues:
-    print(f"  - Key: {issue.key}, Summary: {issue.fields.summary}, Status: {issue.fields.status.name}")
+if __name__ == "__main__":
+    sys.exit(main())
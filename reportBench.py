@@ -0,0 +1,324 @@
+# Synthetic report corpus and throughput benchmark for the reportCount parsers.
+#
+#   python reportBench.py generate bench-corpus --size-mb 5
+#   python reportBench.py run bench-corpus --output bench-results.json
+#   python reportBench.py run bench-corpus --compare bench-results.json
+#
+# Every counter runs in its own child process, so the reported peak RSS
+# belongs to that counter alone. tkinter is blocked in the child, and nothing
+# here needs a display. Peak RSS comes from the resource module, so `run`
+# only works on Unix. Compare PDF extractors with, for example,
+#
+#   python reportBench.py run bench-corpus --pdf-backend pypdfium2 --compare bench-results.json
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MANIFEST = "manifest.json"
+
+PDF_SEVERITIES = ["Critical", "High", "Medium", "Low"]
+HTML_SEVERITIES = ["Critical", "High", "Medium", "Low", "Informational"]
+LICENSE_RISKS = ["High", "Medium", "Low", "None", "Unknown"]
+ISSUE_COUNTER_COLUMNS = [
+    "Critical Issues",
+    "High Issues",
+    "Medium Issues",
+    "Low Issues",
+    "Informational Issues"
+]
+
+# counter -> corpus file it is measured on
+BENCHMARKS = {
+    "count_vulnerabilities_in_fix_groups": "fix_groups.pdf",
+    "count_license_risks": "license.html",
+    "count_issues_by_severity_in_fix_groups_html": "fix_groups.html",
+    "count_issues_by_severity_from_csv": "issues.csv",
+    "count_severity_from_csv": "issues.csv",
+    "count_severity_from_issue_counters": "issue_counters.csv",
+}
+
+def _pdf_bytes(pages):
+    # Minimal uncompressed PDF with one Helvetica text line per entry
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+
+    def add(num, content):
+        offsets.append((num, len(out)))
+        out.extend(f"{num} 0 obj\n".encode() + content + b"\nendobj\n")
+
+    page_nums = [4 + 2 * i for i in range(len(pages))]
+    add(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{num} 0 R" for num in page_nums)
+    add(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    add(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for num, lines in zip(page_nums, pages):
+        ops = ["BT /F1 10 Tf 14 TL 40 800 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+        add(num, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {num + 1} 0 R >>"
+        ).encode())
+        add(num + 1, f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    xref = len(out)
+    size = len(offsets) + 1
+    out.extend(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+    for _, offset in sorted(offsets):
+        out.extend(f"{offset:010d} 00000 n \n".encode())
+    out.extend(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return bytes(out)
+
+def _tally(counts, key, amount=1):
+    counts[key] = counts.get(key, 0) + amount
+
+def generate_pdf(path, size, rng, lines_per_page=50):
+    # Fix-group lines fill the report, then a trailing section whose
+    # severities must not be counted
+    expected = {sev: 0 for sev in PDF_SEVERITIES}
+    lines = ["Security Report", "Issues - By Fix Groups:"]
+    n = 0
+    # ~60 bytes of PDF per line of text
+    while len(lines) * 60 < size:
+        n += 1
+        sev = rng.choice(PDF_SEVERITIES)
+        _tally(expected, sev)
+        lines.append(f"Fix group {n} upgrade package-{n} to a fixed release {sev}")
+    lines += ["End of fix groups", "OTHER FINDINGS:"]
+    lines += [f"Finding {i} {rng.choice(PDF_SEVERITIES)}" for i in range(lines_per_page)]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    with open(path, "wb") as f:
+        f.write(_pdf_bytes(pages))
+    return expected
+
+def generate_license_html(path, size, rng):
+    expected = {}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<html><body>\n<h1>Report:</h1>\n<h2>Total Open Source License Types:</h2>\n<table>\n")
+        n = 0
+        while f.tell() < size:
+            n += 1
+            risk, count = rng.choice(LICENSE_RISKS), rng.randint(1, 50)
+            _tally(expected, risk, count)
+            f.write(f"<tr><td>license-{n}</td><td>{risk}</td><td>{count}</td></tr>\n")
+        f.write("</table>\n</body></html>\n")
+    return expected
+
+def generate_fix_groups_html(path, size, rng):
+    expected = {sev: 0 for sev in HTML_SEVERITIES}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<html><body>\n<h2>Issues - By Fix Groups:</h2>\n<table>\n")
+        n = 0
+        while f.tell() < size:
+            n += 1
+            sev = rng.choice(HTML_SEVERITIES)
+            _tally(expected, sev)
+            f.write(f"<tr><td>fix group {n}</td><td>package-{n}</td><td>{sev}</td></tr>\n")
+        f.write("</table>\n<h2>Other Findings:</h2>\n")
+        for i in range(100):
+            f.write(f"<p>finding {i} {rng.choice(HTML_SEVERITIES)}</p>\n")
+        f.write("</body></html>\n")
+    return expected
+
+def generate_issues_csv(path, size, rng):
+    known = {sev: 0 for sev in HTML_SEVERITIES}
+    seen = {}
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Id,Name,Severity,Description\r\n")
+        n = 0
+        while f.tell() < size:
+            n += 1
+            sev = rng.choice(HTML_SEVERITIES)
+            _tally(known, sev)
+            _tally(seen, sev)
+            f.write(f'{n},issue-{n},{sev},"found in package-{n}, module {n % 97}"\r\n')
+    return known, seen
+
+def generate_issue_counters_csv(path, size, rng):
+    # The summary block comes last, the worst case for finding it
+    expected = {column: rng.randint(0, 500) for column in ISSUE_COUNTER_COLUMNS}
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Scan,Project,Branch\r\n")
+        n = 0
+        while f.tell() < size:
+            n += 1
+            f.write(f'scan-{n},project-{n % 13},"release, build {n}"\r\n')
+        f.write("\r\nIssue Counters:\r\n")
+        f.write(",".join(ISSUE_COUNTER_COLUMNS) + "\r\n")
+        f.write(",".join(f'"{expected[column]}"' for column in ISSUE_COUNTER_COLUMNS) + "\r\n")
+    return expected
+
+def generate(directory, size_mb, seed):
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    size = int(size_mb * 1024 * 1024)
+    path = lambda name: os.path.join(directory, name)
+    known, seen = generate_issues_csv(path("issues.csv"), size, rng)
+    expected = {
+        "count_vulnerabilities_in_fix_groups": generate_pdf(path("fix_groups.pdf"), size, rng),
+        "count_license_risks": generate_license_html(path("license.html"), size, rng),
+        "count_issues_by_severity_in_fix_groups_html": generate_fix_groups_html(path("fix_groups.html"), size, rng),
+        "count_issues_by_severity_from_csv": known,
+        "count_severity_from_csv": seen,
+        "count_severity_from_issue_counters": generate_issue_counters_csv(path("issue_counters.csv"), size, rng),
+    }
+    with open(path(MANIFEST), "w") as f:
+        json.dump({"size_mb": size_mb, "seed": seed, "expected": expected}, f, indent=2)
+    for name in sorted(set(BENCHMARKS.values())):
+        print(f"{name:<22} {os.path.getsize(path(name)) / 1024 / 1024:8.2f} MB")
+
+def measure(function, path, repeat):
+    # Runs inside the child process
+    import resource
+
+    sys.modules["tkinter"] = None  # reportCount falls back to headless mode
+    sys.path.insert(0, HERE)
+    import reportCount
+
+    counter = getattr(reportCount, function)
+    import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = counter(path)
+        times.append(time.perf_counter() - started)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    json.dump({
+        "times": times,
+        "result": result,
+        "import_rss_mb": import_rss / scale,
+        "peak_rss_mb": peak_rss / scale,
+    }, sys.stdout)
+
+def run_case(function, path, repeat, env):
+    child = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "measure", function, path, str(repeat)],
+        capture_output=True, text=True, env={**os.environ, **env, "REPORT_CACHE": "off"},
+    )
+    if child.returncode != 0:
+        raise RuntimeError(f"{function} failed:\n{child.stderr}")
+    return json.loads(child.stdout)
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(directory, functions, repeat, pdf_backend=None, page_workers=None):
+    env = {}
+    if pdf_backend:
+        env["PDF_BACKEND"] = pdf_backend
+    if page_workers:
+        env["PDF_PAGE_WORKERS"] = str(page_workers)
+    with open(os.path.join(directory, MANIFEST)) as f:
+        expected = json.load(f)["expected"]
+    cases = []
+    for function in functions:
+        path = os.path.join(directory, BENCHMARKS[function])
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        measured = run_case(function, path, repeat, env)
+        best = min(measured["times"])
+        case = {
+            "name": function,
+            "file": BENCHMARKS[function],
+            "size_mb": size_mb,
+            "best_s": best,
+            "median_s": statistics.median(measured["times"]),
+            "mb_per_s": size_mb / best if best else None,
+            "import_rss_mb": measured["import_rss_mb"],
+            "peak_rss_mb": measured["peak_rss_mb"],
+            "correct": measured["result"] == expected[function],
+        }
+        cases.append(case)
+        print(
+            f"{function:<46} {case['best_s']:8.3f}s {case['mb_per_s']:8.1f} MB/s "
+            f"{case['peak_rss_mb']:8.1f} MB RSS{'' if case['correct'] else '  WRONG RESULT'}",
+            file=sys.stderr,
+        )
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "pdf_backend": pdf_backend or os.environ.get("PDF_BACKEND", "pypdf2"),
+            "page_workers": page_workers or os.environ.get("PDF_PAGE_WORKERS") or os.cpu_count(),
+        },
+        "cases": cases,
+    }
+
+def compare(results, baseline_path, metric):
+    # > 1.0 means worse than the baseline
+    with open(baseline_path) as f:
+        baseline = {case["name"]: case for case in json.load(f)["cases"]}
+    print(f"\n{'case':<46} {'baseline':>10} {'current':>10} {'ratio':>8}")
+    for case in results["cases"]:
+        before = baseline.get(case["name"], {}).get(metric)
+        after = case.get(metric)
+        if before and after:
+            print(f"{case['name']:<46} {before:>10.3f} {after:>10.3f} {after / before:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reportCount parsers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write a synthetic report corpus")
+    gen.add_argument("directory")
+    gen.add_argument("--size-mb", type=float, default=5, help="approximate size of each report")
+    gen.add_argument("--seed", type=int, default=1234)
+
+    bench = commands.add_parser("run", help="time every counter against a corpus")
+    bench.add_argument("directory")
+    bench.add_argument("--functions", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.add_argument("--output", help="write JSON results here instead of stdout")
+    bench.add_argument("--compare", help="baseline JSON to compare against")
+    bench.add_argument("--metric", default="best_s", help="metric used by --compare")
+    bench.add_argument("--pdf-backend", help="PDF_BACKEND for the PDF counter (pypdf2, pypdfium2, pdfminer, auto)")
+    bench.add_argument("--page-workers", type=int, help="PDF_PAGE_WORKERS for the PDF counter")
+
+    child = commands.add_parser("measure")
+    child.add_argument("function")
+    child.add_argument("path")
+    child.add_argument("repeat", type=int)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.directory, args.size_mb, args.seed)
+    elif args.command == "measure":
+        measure(args.function, args.path, args.repeat)
+    else:
+        results = run(args.directory, args.functions, args.repeat, args.pdf_backend, args.page_workers)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+            print(f"Results written to {args.output}", file=sys.stderr)
+        else:
+            print(text)
+        if args.compare:
+            compare(results, args.compare, args.metric)
+        if not all(case["correct"] for case in results["cases"]):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
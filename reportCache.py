@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "reportCount",
+    "cache.sqlite3",
+)
+REPORT_CACHE_MAX_BYTES = int(float(os.environ.get("REPORT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+HASH_CHUNK_SIZE = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+class ReportCache:
+    # Parsed report results keyed by content hash, counter name and parser
+    # version, so a renamed or copied report still hits and a parser change
+    # never serves stale counts. The files table remembers the hash of each
+    # path by size and mtime, which makes an unchanged file a stat() and one
+    # lookup. Entries are evicted least recently used once their total size
+    # passes max_bytes. Safe to share between processes (SQLite WAL).
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def digest(self, path):
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        row = self.conn.execute(
+            "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row:
+            return row[0]
+        digest = file_digest(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest),
+        )
+        return digest
+
+    def get(self, key):
+        row = self.conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        data = json.dumps(result)
+        size = len(key) + len(data)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, result, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, data, size, time.time()),
+        )
+        self.evict()
+
+    def evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            self.conn.executemany("DELETE FROM results WHERE key = ?", stale)
+            # Hashes of files whose results are gone are cheap to recompute
+            self.conn.execute("DELETE FROM files WHERE digest NOT IN (SELECT substr(key, 1, 64) FROM results)")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def cached(self, counter, path, version):
+        key = f"{self.digest(path)}:{counter.__name__}:{version}"
+        result = self.get(key)
+        if result is None:
+            result = counter(path)
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        self.conn.execute("DELETE FROM results")
+        self.conn.execute("DELETE FROM files")
+
+    def stats(self):
+        entries, size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self.conn.close()
+
+_cache = None
+_cache_pid = None
+
+def get_report_cache():
+    # One connection per process. REPORT_CACHE is read on every call so a
+    # setting made before starting worker processes reaches them too;
+    # REPORT_CACHE=off disables caching.
+    global _cache, _cache_pid
+    path = os.environ.get("REPORT_CACHE", DEFAULT_CACHE_PATH)
+    if path.lower() in ("", "0", "off", "none"):
+        return None
+    if _cache is None or _cache_pid != os.getpid() or _cache.path != path:
+        _cache = ReportCache(path, REPORT_CACHE_MAX_BYTES)
+        _cache_pid = os.getpid()
+    return _cache
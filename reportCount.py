@@ -1,37 +1,205 @@
 import PyPDF2
-import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog
 from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import csv
+import glob
+import io
+import json
+import mmap
+import os
+import re
+import sys
+import time
 
-def count_vulnerabilities_in_fix_groups(pdf_path):
-    counts = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0}
-    section_started = False
-    section_text = ""
+from reportCache import get_report_cache
+
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, simpledialog
+except ImportError:
+    # Headless hosts without Tk can still use the batch mode
+    tk = None
+
+# Bump whenever a counter's output changes so cached results are not reused
+PARSER_VERSION = 3
+
+FIX_GROUPS_HEADING = "Issues - By Fix Groups:"
+LICENSE_HEADING = "Total Open Source License Types:"
+PDF_SEVERITIES = ["Critical", "High", "Medium", "Low"]
+# A line with only uppercase letters and a colon starts the next section
+NEXT_PDF_HEADING = re.compile(r"\n[A-Z][A-Z\s\-]+:")
+
+class SeverityCounter:
+    # Counts severity words over a stream of text pieces, exactly as if the
+    # pieces had been concatenated, with one compiled-regex pass per piece.
+    # Only the last few characters are kept, so a word split across two
+    # pieces is still counted. The severity words must not overlap each
+    # other, which holds for the scanner severities.
+    def __init__(self, severities):
+        self.counts = {sev: 0 for sev in severities}
+        self._pattern = re.compile("|".join(re.escape(sev) for sev in severities))
+        self._overlap = max(len(sev) for sev in severities) - 1
+        self._tail = ""
+
+    def feed(self, text):
+        buffer = self._tail + text
+        counted = len(self._tail)
+        for match in self._pattern.finditer(buffer):
+            if match.end() > counted:
+                self.counts[match.group()] += 1
+        self._tail = buffer[-self._overlap:] if self._overlap else ""
+
+# Every page worker gets at least this many pages, so shorter documents are
+# extracted in-process; starting a pool costs more than it saves there
+PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "64"))
+
+def _pypdf2_page_count(pdf_path):
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def _pypdf2_pages(pdf_path, start=0, stop=None):
     with open(pdf_path, 'rb') as file:
         reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            text = page.extract_text()
-            if not text:
+        for page in reader.pages[start:stop]:
+            yield page.extract_text()
+
+def _pdfium_page_count(pdf_path):
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def _pdfium_pages(pdf_path, start=0, stop=None):
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        for index in range(start, len(pdf) if stop is None else min(stop, len(pdf))):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            # pdfium ends lines with \r\n; the section regexes expect \n
+            yield textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+def _pdfminer_page_count(pdf_path):
+    from pdfminer.pdfpage import PDFPage
+
+    with open(pdf_path, 'rb') as file:
+        return sum(1 for _ in PDFPage.get_pages(file))
+
+def _pdfminer_pages(pdf_path, start=0, stop=None):
+    import io
+    from itertools import islice
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    # Without any layout analysis pdfminer emits no line breaks, which the
+    # section regexes need, so only the costly box ordering is switched off
+    resources = PDFResourceManager()
+    out = io.StringIO()
+    device = TextConverter(resources, out, laparams=LAParams(boxes_flow=None))
+    interpreter = PDFPageInterpreter(resources, device)
+    try:
+        with open(pdf_path, 'rb') as file:
+            for page in islice(PDFPage.get_pages(file), start, stop):
+                interpreter.process_page(page)
+                yield out.getvalue().replace("\x0c", "")
+                out.seek(0)
+                out.truncate()
+    finally:
+        device.close()
+
+# name -> (page count, page text iterator over [start, stop))
+PDF_BACKENDS = {
+    "pypdf2": (_pypdf2_page_count, _pypdf2_pages),
+    "pypdfium2": (_pdfium_page_count, _pdfium_pages),
+    "pdfminer": (_pdfminer_page_count, _pdfminer_pages),
+}
+# Fastest first, for PDF_BACKEND=auto. pdfminer is many times slower than
+# either, so it is only used when asked for by name.
+PDF_BACKEND_PREFERENCE = [("pypdfium2", "pypdfium2"), ("pypdf2", "PyPDF2")]
+
+def pdf_backend_name(name=None):
+    name = name or os.environ.get("PDF_BACKEND", "pypdf2")
+    if name == "auto":
+        for backend, module in PDF_BACKEND_PREFERENCE:
+            try:
+                __import__(module)
+                return backend
+            except ImportError:
                 continue
-            if not section_started:
-                idx = text.find("Issues - By Fix Groups:")
-                if idx != -1:
-                    section_started = True
-                    section_text += text[idx + len("Issues - By Fix Groups:") :]
-            elif section_started:
-                # Stop if another heading is found (e.g., a line with only uppercase letters and colon)
-                import re
-                match = re.search(r"\n[A-Z][A-Z\s\-]+:", text)
-                if match:
-                    section_text += text[: match.start()]
-                    break
-                else:
-                    section_text += text
-    # Count severities in the extracted section
-    for severity in counts.keys():
-        counts[severity] = section_text.count(severity)
-    return counts
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name} (choose from {', '.join(PDF_BACKENDS)} or auto)")
+    return name
+
+def _page_workers():
+    workers = os.environ.get("PDF_PAGE_WORKERS")
+    return int(workers) if workers else (os.cpu_count() or 1)
+
+def _extract_page_range(backend, pdf_path, start, stop):
+    return list(PDF_BACKENDS[backend][1](pdf_path, start, stop))
+
+def iter_pdf_page_texts(pdf_path, backend=None, workers=None):
+    # Yields page texts in document order. Larger documents are split into
+    # page ranges extracted by a process pool; results are yielded in order,
+    # and ranges not yet started are cancelled once the caller stops reading.
+    backend = pdf_backend_name(backend)
+    page_count, pages = PDF_BACKENDS[backend]
+    workers = _page_workers() if workers is None else workers
+    total = page_count(pdf_path) if workers > 1 else 0
+    workers = min(workers, total // PARALLEL_MIN_PAGES)
+    if workers <= 1:
+        yield from pages(pdf_path)
+        return
+
+    step = -(-total // (workers * 4))
+    starts = range(0, total, step)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        ranges = executor.map(
+            _extract_page_range,
+            [backend] * len(starts), [pdf_path] * len(starts), starts, [start + step for start in starts],
+        )
+        for texts in ranges:
+            yield from texts
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def count_fix_group_severities(page_texts):
+    # Consumes page texts lazily and stops pulling pages once the section ends
+    counter = SeverityCounter(PDF_SEVERITIES)
+    section_started = False
+    for text in page_texts:
+        if not text:
+            continue
+        if not section_started:
+            idx = text.find(FIX_GROUPS_HEADING)
+            if idx != -1:
+                section_started = True
+                counter.feed(text[idx + len(FIX_GROUPS_HEADING) :])
+        else:
+            match = NEXT_PDF_HEADING.search(text)
+            if match:
+                counter.feed(text[: match.start()])
+                break
+            counter.feed(text)
+    return counter.counts
+
+def count_vulnerabilities_in_fix_groups(pdf_path, backend=None, workers=None):
+    page_texts = iter_pdf_page_texts(pdf_path, backend, workers)
+    try:
+        return count_fix_group_severities(page_texts)
+    finally:
+        page_texts.close()
 
 class LicenseRiskHTMLParser(HTMLParser):
     def __init__(self):
@@ -63,83 +231,216 @@ class LicenseRiskHTMLParser(HTMLParser):
                 self.risk_counts[self.current_risk] = self.risk_counts.get(self.current_risk, 0) + int(data)
                 self.current_risk = None
 
-def count_license_risks(html_path):
+HTML_SEVERITIES = ["Critical", "High", "Medium", "Low", "Informational"]
+# Next heading such as <h2>Something:</h2> ends the fix-groups section
+NEXT_HTML_HEADING = re.compile(r"<h[1-6][^>]*>.*:</h[1-6]>")
+HTML_CHUNK_SIZE = 1 << 16
+# Longest line the end-of-section heading search is guaranteed to see;
+# fix-groups text further back than this is counted and dropped
+HTML_HEADING_WINDOW = 1 << 16
+
+class HTMLReportScanner:
+    # Scans an HTML report fed in chunks, finding the license and fix-group
+    # sections on the fly. Produces the same counts as reading the whole
+    # file and slicing it, while holding only small buffers.
+    def __init__(self, count_licenses=True, count_severities=True):
+        self.license_parser = LicenseRiskHTMLParser() if count_licenses else None
+        self.severity_counter = SeverityCounter(HTML_SEVERITIES)
+        self.license_found = False
+        self.fix_groups_found = False
+        self.fix_groups_done = not count_severities
+        self._license_tail = ""
+        self._license_pending = ""
+        self._fix_tail = ""
+        self._fix_pending = ""
+
+    @property
+    def finished(self):
+        # The license parser reads to the end of the document, so only a
+        # severity-only scan can stop early
+        return self.license_parser is None and self.fix_groups_done
+
+    def feed(self, chunk):
+        if self.license_parser is not None:
+            self._feed_license(chunk)
+        if not self.fix_groups_done:
+            self._feed_fix_groups(chunk)
+
+    def _feed_license(self, chunk):
+        if not self.license_found:
+            window = self._license_tail + chunk
+            idx = window.find(LICENSE_HEADING)
+            if idx == -1:
+                self._license_tail = window[-(len(LICENSE_HEADING) - 1):]
+                return
+            self.license_found = True
+            chunk = window[idx:]
+        # Only hand the parser data ending right before a '<', so a text run
+        # is never split over two feed() calls and handle_data sees it whole
+        data = self._license_pending + chunk
+        cut = data.rfind("<")
+        if cut <= 0:
+            self._license_pending = data
+            return
+        self.license_parser.feed(data[:cut])
+        self._license_pending = data[cut:]
+
+    def _feed_fix_groups(self, chunk):
+        if not self.fix_groups_found:
+            window = self._fix_tail + chunk
+            idx = window.find(FIX_GROUPS_HEADING)
+            if idx == -1:
+                self._fix_tail = window[-(len(FIX_GROUPS_HEADING) - 1):]
+                return
+            self.fix_groups_found = True
+            chunk = window[idx:]
+        pending = self._fix_pending + chunk
+        match = NEXT_HTML_HEADING.search(pending)
+        # An earlier heading tag on the same line could still match once more
+        # of the line arrives, so a match only counts after its line has ended,
+        # or once HTML_HEADING_WINDOW characters past it have gone by
+        if match and ("\n" in pending[match.end():] or len(pending) - match.start() > HTML_HEADING_WINDOW):
+            self._end_fix_groups(pending[: match.start()])
+            return
+        cut = max(0, len(pending) - HTML_HEADING_WINDOW)
+        if match:
+            cut = min(cut, match.start())
+        self.severity_counter.feed(pending[:cut])
+        self._fix_pending = pending[cut:]
+
+    def _end_fix_groups(self, text):
+        self.severity_counter.feed(text)
+        self._fix_pending = ""
+        self.fix_groups_done = True
+
+    def close(self):
+        if self.license_parser is not None and self._license_pending:
+            self.license_parser.feed(self._license_pending)
+            self._license_pending = ""
+        if not self.fix_groups_done:
+            match = NEXT_HTML_HEADING.search(self._fix_pending)
+            self._end_fix_groups(self._fix_pending[: match.start()] if match else self._fix_pending)
+
+def scan_html_report(html_path, count_licenses=True, count_severities=True):
+    # One pass over the file; a section that isn't in the report maps to None
+    scanner = HTMLReportScanner(count_licenses, count_severities)
     with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-    parser = LicenseRiskHTMLParser()
-    # Find the section "Total Open Source License Types:"
-    section_start = html_content.find("Total Open Source License Types:")
-    if section_start == -1:
-        return {}
-    # Parse only the relevant section (from the heading to the next heading or end)
-    section = html_content[section_start:]
-    parser.feed(section)
-    return parser.risk_counts
+        while not scanner.finished:
+            chunk = f.read(HTML_CHUNK_SIZE)
+            if not chunk:
+                break
+            scanner.feed(chunk)
+    scanner.close()
+    return {
+        "license_risks": scanner.license_parser.risk_counts if scanner.license_found else None,
+        "fix_group_severities": scanner.severity_counter.counts if scanner.fix_groups_found else None,
+    }
+
+def count_license_risks(html_path):
+    return scan_html_report(html_path, count_severities=False)["license_risks"] or {}
 
 def count_issues_by_severity_in_fix_groups_html(html_path):
-    severities = ["Critical", "High", "Medium", "Low", "Informational"]
-    counts = {sev: 0 for sev in severities}
-    with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-    # Find the section "Issues - By Fix Groups:"
-    section_start = html_content.find("Issues - By Fix Groups:")
-    if section_start == -1:
-        return counts
-    section = html_content[section_start:]
-    # Optionally, stop at the next heading (e.g., next <h1>, <h2>, or similar marker)
-    import re
-    match = re.search(r"<h[1-6][^>]*>.*:</h[1-6]>", section)
-    if match and match.start() > 0:
-        section = section[:match.start()]
-    # Count severities in the section
-    for sev in severities:
-        counts[sev] = section.count(sev)
+    counts = scan_html_report(html_path, count_licenses=False)["fix_group_severities"]
+    return counts or {sev: 0 for sev in HTML_SEVERITIES}
+
+CSV_SEVERITIES = ["Critical", "High", "Medium", "Low", "Informational"]
+ISSUE_COUNTERS_HEADING = b"Issue Counters:"
+ISSUE_COUNTER_COLUMNS = [
+    "Critical Issues",
+    "High Issues",
+    "Medium Issues",
+    "Low Issues",
+    "Informational Issues"
+]
+
+def _iter_lines(mm, start=0):
+    # mmap.readline only splits on \n, so files with bare \r line endings
+    # (classic Mac exports) are read through a text wrapper instead
+    if mm.find(b"\n", start) == -1 and mm.find(b"\r", start) != -1:
+        yield from io.TextIOWrapper(io.BytesIO(mm[start:]), encoding="utf-8", newline="")
+        return
+    mm.seek(start)
+    for line in iter(mm.readline, b""):
+        yield line.decode("utf-8")
+
+def _find_line_start(mm, needle):
+    # Offset of the first occurrence of needle that only has whitespace
+    # before it on its line, or -1
+    pos = mm.find(needle)
+    while pos != -1:
+        line_start = max(mm.rfind(b"\n", 0, pos), mm.rfind(b"\r", 0, pos)) + 1
+        if not mm[line_start:pos].strip():
+            return pos
+        pos = mm.find(needle, pos + 1)
+    return -1
+
+def _read_issue_counters(mm):
+    pos = _find_line_start(mm, ISSUE_COUNTERS_HEADING)
+    if pos == -1:
+        return None
+    # The line after the heading is the header, the one after that the values
+    lines = _iter_lines(mm, pos)
+    next(lines)
+    lines = [next(lines, ""), next(lines, "")]
+    header, values = (next(csv.reader([line]), []) for line in lines)
+    header = [h.strip() for h in header]
+    values = [v.strip().strip('"') for v in values]
+    counts = {}
+    for sev in ISSUE_COUNTER_COLUMNS:
+        if sev in header:
+            counts[sev] = int(values[header.index(sev)])
     return counts
 
+def _tally_severity_column(mm):
+    rows = csv.reader(_iter_lines(mm))
+    header = next(rows, None)
+    if not header or "Severity" not in header:
+        return None, None
+    # Same column csv.DictReader would pick if the name is repeated
+    column = len(header) - 1 - header[::-1].index("Severity")
+    known = {sev: 0 for sev in CSV_SEVERITIES}
+    seen = {}
+    for row in rows:
+        if not row:
+            continue
+        severity = row[column] if column < len(row) else ""
+        capitalized = severity.capitalize()
+        if capitalized in known:
+            known[capitalized] += 1
+        severity = severity.strip()
+        if severity:
+            seen[severity] = seen.get(severity, 0) + 1
+    return known, seen
+
+def scan_csv_report(csv_path):
+    # Maps the file once and returns everything the CSV counters report:
+    #   issue_counters: values of the "Issue Counters:" summary block
+    #   severities:     rows per known severity (Critical..Informational)
+    #   severity_counts: rows per distinct Severity value
+    # A block or column that isn't in the file maps to None.
+    result = {"issue_counters": None, "severities": None, "severity_counts": None}
+    with open(csv_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return result
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            result["issue_counters"] = _read_issue_counters(mm)
+            result["severities"], result["severity_counts"] = _tally_severity_column(mm)
+    return result
+
 def count_issues_by_severity_from_csv(csv_path):
-    severities = ["Critical", "High", "Medium", "Low", "Informational"]
-    counts = {sev: 0 for sev in severities}
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            severity = row.get("Severity", "").capitalize()
-            if severity in counts:
-                counts[severity] += 1
-    return counts
+    return scan_csv_report(csv_path)["severities"] or {sev: 0 for sev in CSV_SEVERITIES}
 
 def count_severity_from_csv(csv_path):
-    counts = {}
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            severity = row.get("Severity", "").strip()
-            if severity:
-                counts[severity] = counts.get(severity, 0) + 1
-    return counts
+    return scan_csv_report(csv_path)["severity_counts"] or {}
 
 def count_severity_from_issue_counters(csv_path):
-    severities = [
-        "Critical Issues",
-        "High Issues",
-        "Medium Issues",
-        "Low Issues",
-        "Informational Issues"
-    ]
-    counts = {}
-    with open(csv_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    # Find the line with "Issue Counters:"
-    for i, line in enumerate(lines):
-        if line.strip().startswith("Issue Counters:"):
-            # Next line is header, next-next line is values
-            header = [h.strip() for h in lines[i+1].split(",")]
-            values = [v.strip().strip('"') for v in lines[i+2].split(",")]
-            for sev in severities:
-                if sev in header:
-                    idx = header.index(sev)
-                    counts[sev] = int(values[idx])
-            break
-    return counts
+    return scan_csv_report(csv_path)["issue_counters"] or {}
+
+def cached_count(counter, path):
+    cache = get_report_cache()
+    if cache is None:
+        return counter(path)
+    return cache.cached(counter, path, PARSER_VERSION)
 
 def select_file_and_count():
     root = tk.Tk()
@@ -150,7 +451,7 @@ def select_file_and_count():
     )
     if pdf_file:
         try:
-            result = count_vulnerabilities_in_fix_groups(pdf_file)
+            result = cached_count(count_vulnerabilities_in_fix_groups, pdf_file)
             msg = "Vulnerability Counts (Issues - By Fix Groups):\n" + "\n".join(f"{severity}: {count}" for severity, count in result.items())
             messagebox.showinfo("Results", msg)
         except Exception as e:
@@ -167,7 +468,7 @@ def select_html_file_and_count():
     )
     if html_file:
         try:
-            result = count_license_risks(html_file)
+            result = cached_count(count_license_risks, html_file)
             if result:
                 msg = "License Risk Counts (Total Open Source License Types):\n" + "\n".join(f"{risk}: {count}" for risk, count in result.items())
             else:
@@ -187,7 +488,7 @@ def select_html_file_and_count_sca_api():
     )
     if html_file:
         try:
-            result = count_issues_by_severity_in_fix_groups_html(html_file)
+            result = cached_count(count_issues_by_severity_in_fix_groups_html, html_file)
             msg = "SCA API Issues (By Fix Groups):\n" + "\n".join(f"{sev}: {count}" for sev, count in result.items())
             messagebox.showinfo("Results", msg)
         except Exception as e:
@@ -204,7 +505,7 @@ def select_csv_file_and_count():
     )
     if csv_file:
         try:
-            result = count_severity_from_issue_counters(csv_file)
+            result = cached_count(count_severity_from_issue_counters, csv_file)
             msg = "Issue Counts (CSV Summary):\n" + "\n".join(f"{sev}: {count}" for sev, count in result.items())
             messagebox.showinfo("Results", msg)
         except Exception as e:
@@ -212,7 +513,132 @@ def select_csv_file_and_count():
     else:
         messagebox.showinfo("Info", "No file selected.")
 
-def main():
+REPORT_EXTENSIONS = (".pdf", ".html", ".htm", ".csv")
+
+def detect_report_type(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        return "pdf_fix_groups"
+    if extension in (".html", ".htm"):
+        # Resolved by scan_html_report, which finds both sections in one pass
+        return "html"
+    if extension == ".csv":
+        # Resolved by scan_csv_report
+        return "csv"
+    return None
+
+REPORT_COUNTERS = {
+    "pdf_fix_groups": count_vulnerabilities_in_fix_groups,
+    "html_license": count_license_risks,
+    "html_fix_groups": count_issues_by_severity_in_fix_groups_html,
+    "csv_issue_counters": count_severity_from_issue_counters,
+    "csv_severity": count_severity_from_csv,
+}
+
+# HTML report sections: license risks and fix-group issues measure different
+# things, so a report with both yields a result for each
+HTML_SECTIONS = [("html_license", "license_risks"), ("html_fix_groups", "fix_group_severities")]
+# CSV report sections: both count the same issues, so the first one found wins
+CSV_SECTIONS = [("csv_issue_counters", "issue_counters"), ("csv_severity", "severity_counts")]
+
+def report_sections(path):
+    # [(type, counts)] for the sections found in the report
+    report_type = detect_report_type(path)
+    if report_type == "html":
+        sections = cached_count(scan_html_report, path)
+        return [(name, sections[key]) for name, key in HTML_SECTIONS if sections[key] is not None]
+    if report_type == "csv":
+        sections = cached_count(scan_csv_report, path)
+        return [(name, sections[key]) for name, key in CSV_SECTIONS if sections[key] is not None][:1]
+    if report_type is not None:
+        return [(report_type, cached_count(REPORT_COUNTERS[report_type], path))]
+    return []
+
+def process_report(path):
+    # Runs in a worker process and returns one result per report section;
+    # errors are reported per file, not raised
+    started = time.perf_counter()
+    error = None
+    try:
+        sections = report_sections(path)
+        if not sections:
+            error = "Unrecognized report type"
+    except Exception as e:
+        sections, error = [], f"{type(e).__name__}: {e}"
+    seconds = round(time.perf_counter() - started, 3)
+    if error is not None:
+        return [{"path": path, "type": None, "counts": None, "error": error, "seconds": seconds}]
+    return [
+        {"path": path, "type": report_type, "counts": counts, "error": None, "seconds": seconds}
+        for report_type, counts in sections
+    ]
+
+def find_reports(patterns):
+    # Returns the report paths and the patterns that matched none
+    paths = set()
+    unmatched = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found = [
+                os.path.join(dirpath, filename)
+                for dirpath, _, filenames in os.walk(pattern)
+                for filename in filenames
+                if filename.lower().endswith(REPORT_EXTENSIONS)
+            ]
+        else:
+            found = [p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)]
+        if not found:
+            unmatched.append(pattern)
+        paths.update(found)
+    return sorted(paths), unmatched
+
+def aggregate(results):
+    totals = {}
+    for result in results:
+        if result["counts"]:
+            type_totals = totals.setdefault(result["type"], {})
+            for severity, count in result["counts"].items():
+                type_totals[severity] = type_totals.get(severity, 0) + count
+    return totals
+
+def write_summary(results, totals, output_format, out):
+    if output_format == "json":
+        json.dump({"reports": results, "totals": totals}, out, indent=2)
+        out.write("\n")
+        return
+    writer = csv.writer(out)
+    writer.writerow(["path", "type", "severity", "count", "error"])
+    for result in results:
+        if result["counts"]:
+            for severity, count in result["counts"].items():
+                writer.writerow([result["path"], result["type"], severity, count, ""])
+        else:
+            writer.writerow([result["path"], result["type"] or "", "", "", result["error"] or ""])
+    for report_type, counts in totals.items():
+        for severity, count in counts.items():
+            writer.writerow(["TOTAL", report_type, severity, count, ""])
+
+def run_batch(patterns, workers=None, output=None, output_format="json"):
+    paths, unmatched = find_reports(patterns)
+    # A mistyped path must not read as a report without findings
+    for pattern in unmatched:
+        print(f"reportCount: no reports match {pattern!r}", file=sys.stderr)
+    # PDF text extraction is CPU-bound, so reports are spread over processes;
+    # with several files that already keeps the CPUs busy, so pages of one
+    # PDF are not split further unless asked for
+    if len(paths) > 1:
+        os.environ.setdefault("PDF_PAGE_WORKERS", "1")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = [result for results in executor.map(process_report, paths) for result in results]
+    totals = aggregate(results)
+    if output:
+        with open(output, "w", encoding="utf-8", newline="") as out:
+            write_summary(results, totals, output_format, out)
+    else:
+        write_summary(results, totals, output_format, sys.stdout)
+    return 1 if unmatched or any(result["error"] for result in results) else 0
+
+def run_gui():
     root = tk.Tk()
     root.withdraw()
     choices = [
@@ -240,5 +666,39 @@ def main():
     else:
         messagebox.showinfo("Info", f"No functionality implemented for '{choice}' yet.")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Count issues in security reports. Without arguments, opens the Tk dialogs."
+    )
+    parser.add_argument("paths", nargs="*", help="report files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", help="write the summary here instead of stdout")
+    parser.add_argument("--cache", help="result cache file (default: $REPORT_CACHE or ~/.cache/reportCount)")
+    parser.add_argument("--no-cache", action="store_true", help="always re-parse reports")
+    parser.add_argument("--pdf-backend", choices=[*PDF_BACKENDS, "auto"], help="PDF text extractor (default: $PDF_BACKEND or pypdf2)")
+    parser.add_argument("--page-workers", type=int, help="processes extracting the pages of one PDF (default: CPU count, one per $PDF_PARALLEL_MIN_PAGES pages)")
+    args = parser.parse_args(argv)
+
+    # Set through the environment so worker processes pick it up as well
+    if args.no_cache:
+        os.environ["REPORT_CACHE"] = "off"
+    elif args.cache:
+        os.environ["REPORT_CACHE"] = args.cache
+    if args.pdf_backend:
+        os.environ["PDF_BACKEND"] = args.pdf_backend
+    if args.page_workers:
+        os.environ["PDF_PAGE_WORKERS"] = str(args.page_workers)
+
+    if not args.paths:
+        if tk is None:
+            parser.error("no report paths given, and the Tk dialogs are not available on this host")
+        try:
+            run_gui()
+        except tk.TclError as e:
+            parser.error(f"no report paths given, and the Tk dialogs could not be opened: {e}")
+        return 0
+    return run_batch(args.paths, args.workers, args.output, args.format)
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# Watch-folder daemon for reportCount.
+#
+#   python reportDaemon.py /srv/reports --port 8765
+#
+# Polls the folder for new, changed and deleted reports and counts them with
+# a pool of worker processes that stay alive, so parser imports are paid
+# once. A report's project is the first directory below the watched folder
+# (reports directly in it belong to "(root)"). A file is counted once its
+# size and mtime have held still for one poll, so half-written uploads are
+# skipped.
+# If a worker dies (e.g. out of memory), the pool is rebuilt and the
+# reports that were queued in it are retried one at a time in a separate
+# worker, so only the report that kills it is recorded as an error.
+#
+# Every processed or removed report is written as one JSON line to stdout
+# (or --events), and running totals are served over HTTP:
+#
+#   GET /totals             {project: {type: {severity: count}}}
+#   GET /totals/<project>   {type: {severity: count}}
+#   GET /reports            latest results for every report, one per section
+#   GET /healthz            scan and queue state
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# The daemon never opens the Tk dialogs, so skip importing tkinter here and
+# in the forked workers
+sys.modules.setdefault("tkinter", None)
+
+import reportCount  # noqa: E402
+
+WATCH_INTERVAL = float(os.environ.get("REPORT_WATCH_INTERVAL", "1.0"))
+ROOT_PROJECT = "(root)"
+
+def _scan_tree(root):
+    # path -> (size, mtime_ns) for every report below root
+    found = {}
+    stack = [root]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(reportCount.REPORT_EXTENSIONS):
+                    stat = entry.stat()
+                    found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+    return found
+
+def _init_worker():
+    # Ctrl+C reaches the whole process group; the parent shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _warm_up(_):
+    return os.getpid()
+
+class ReportWatcher:
+    def __init__(self, root, workers=None, events=sys.stdout, interval=WATCH_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.interval = interval
+        self.events = events
+        self.lock = threading.Lock()
+        self.last_scan = {}    # path -> stat seen on the previous poll
+        self.processed = {}    # path -> stat the current result was computed from
+        self.pending = {}      # path -> (stat, future), future None while waiting to be isolated
+        self.isolated = None   # (path, future) running alone after a worker died
+        self.reports = {}      # path -> [result per section]
+        self.totals = {}       # project -> type -> severity -> count
+        self.scans = 0
+        self.last_scan_seconds = None
+        self.pool_restarts = 0
+        # Reports are spread over processes, so one PDF is not split further
+        os.environ.setdefault("PDF_PAGE_WORKERS", "1")
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = self._start_pool(self.workers)
+        self.isolation = None
+
+    def _start_pool(self, workers):
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        # Start the workers now so the first report doesn't pay for imports
+        list(executor.map(_warm_up, range(workers)))
+        return executor
+
+    def _submit(self, path):
+        # A worker that dies (e.g. killed for running out of memory) breaks the
+        # whole pool: every queued report fails and no new ones are taken
+        try:
+            return self.executor.submit(reportCount.process_report, path)
+        except BrokenProcessPool:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._start_pool(self.workers)
+            with self.lock:
+                self.pool_restarts += 1
+            return self.executor.submit(reportCount.process_report, path)
+
+    def _isolate_next(self):
+        # Reports that were in a broken pool are retried one at a time in a
+        # single-worker pool, so only the one that kills its worker fails
+        if self.isolated is not None and not self.isolated[1].done():
+            return
+        self.isolated = None
+        waiting = sorted(path for path, (_, future) in self.pending.items() if future is None)
+        if not waiting:
+            return
+        if self.isolation is None:
+            self.isolation = self._start_pool(1)
+        try:
+            future = self.isolation.submit(reportCount.process_report, waiting[0])
+        except BrokenProcessPool:
+            self.isolation.shutdown(wait=False, cancel_futures=True)
+            self.isolation = self._start_pool(1)
+            with self.lock:
+                self.pool_restarts += 1
+            future = self.isolation.submit(reportCount.process_report, waiting[0])
+        self.pending[waiting[0]] = (self.pending[waiting[0]][0], future)
+        self.isolated = (waiting[0], future)
+
+    def project_of(self, path):
+        parts = os.path.relpath(path, self.root).split(os.sep)
+        return parts[0] if len(parts) > 1 else ROOT_PROJECT
+
+    def poll(self):
+        started = time.perf_counter()
+        current = _scan_tree(self.root)
+        for path, stat in current.items():
+            settled = self.last_scan.get(path) == stat
+            known = self.processed.get(path) == stat or (
+                path in self.pending and self.pending[path][0] == stat
+            )
+            if settled and not known:
+                self.pending[path] = (stat, self._submit(path))
+        for path in (set(self.processed) | set(self.pending)) - set(current):
+            self._remove(path)
+        self.last_scan = current
+        self._collect()
+        with self.lock:
+            self.scans += 1
+            self.last_scan_seconds = time.perf_counter() - started
+
+    def _collect(self):
+        for path, (stat, future) in list(self.pending.items()):
+            if future is None or not future.done():
+                continue
+            try:
+                results = future.result()
+            except BrokenProcessPool as e:
+                if self.isolated is None or future is not self.isolated[1]:
+                    self.pending[path] = (stat, None)
+                    continue
+                results = [{"path": path, "type": None, "counts": None, "error": f"{type(e).__name__}: {e}"}]
+            except Exception as e:
+                results = [{"path": path, "type": None, "counts": None, "error": f"{type(e).__name__}: {e}"}]
+            del self.pending[path]
+            project = self.project_of(path)
+            for result in results:
+                result["project"] = project
+            self.processed[path] = stat
+            with self.lock:
+                self.reports[path] = results
+                self._update_totals(project)
+            for result in results:
+                self._emit({"event": "report", **result})
+        self._isolate_next()
+
+    def _remove(self, path):
+        self.pending.pop(path, None)
+        if self.processed.pop(path, None) is None:
+            return
+        with self.lock:
+            results = self.reports.pop(path, None)
+            if results:
+                self._update_totals(results[0]["project"])
+        self._emit({"event": "removed", "path": path, "project": self.project_of(path)})
+
+    def _update_totals(self, project):
+        # Recounts one project from its reports; callers hold self.lock
+        totals = reportCount.aggregate(
+            result for results in self.reports.values() for result in results if result["project"] == project
+        )
+        if totals:
+            self.totals[project] = totals
+        else:
+            self.totals.pop(project, None)
+
+    def _emit(self, event):
+        if self.events is None:
+            return
+        self.events.write(json.dumps(event) + "\n")
+        self.events.flush()
+
+    def run(self, stop):
+        while not stop.is_set():
+            self.poll()
+            stop.wait(self.interval)
+
+    def snapshot_totals(self, project=None):
+        with self.lock:
+            if project is None:
+                return json.loads(json.dumps(self.totals))
+            return json.loads(json.dumps(self.totals.get(project)))
+
+    def snapshot_reports(self):
+        with self.lock:
+            return [result for path in sorted(self.reports) for result in self.reports[path]]
+
+    def health(self):
+        with self.lock:
+            return {
+                "root": self.root,
+                "scans": self.scans,
+                "last_scan_seconds": self.last_scan_seconds,
+                "reports": len(self.reports),
+                "pending": len(self.pending),
+                "pool_restarts": self.pool_restarts,
+            }
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.isolation is not None:
+            self.isolation.shutdown(wait=True, cancel_futures=True)
+
+def make_server(watcher, host, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = unquote(self.path.split("?", 1)[0]).rstrip("/")
+            if path == "/totals":
+                self._send(200, watcher.snapshot_totals())
+            elif path.startswith("/totals/"):
+                totals = watcher.snapshot_totals(path[len("/totals/"):])
+                if totals is None:
+                    self._send(404, {"detail": "Unknown project"})
+                else:
+                    self._send(200, totals)
+            elif path == "/reports":
+                self._send(200, watcher.snapshot_reports())
+            elif path == "/healthz":
+                self._send(200, watcher.health())
+            else:
+                self._send(404, {"detail": "Not found"})
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a folder and keep running report counts")
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP port (0 disables the HTTP interface)")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="seconds between polls")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--events", help="append JSON-lines events here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+
+    events = open(args.events, "a", encoding="utf-8") if args.events else sys.stdout
+    watcher = ReportWatcher(args.directory, args.workers, events, args.interval)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    server = None
+    if args.port:
+        server = make_server(watcher, args.host, args.port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving totals on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+
+    try:
+        watcher.run(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+        watcher.close()
+        if events is not sys.stdout:
+            events.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "codes")]
+
+
+@pytest.fixture(scope="session")
+def jira_export():
+    # codes/test.py is a script whose name clashes with the stdlib test package
+    spec = importlib.util.spec_from_file_location("jira_export", os.path.join(ROOT, "codes", "test.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
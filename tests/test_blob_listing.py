@@ -0,0 +1,163 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import Test
+
+
+class Pages:
+    # ItemPaged.by_page(): iterating yields one page, then continuation_token
+    # is where the next one starts
+    def __init__(self, items, page_size, token):
+        self.start = int(token or 0)
+        self.items = items
+        self.page_size = page_size
+        self.continuation_token = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        end = self.start + self.page_size
+        if end < len(self.items):
+            self.continuation_token = str(end)
+        return iter(self.items[self.start:end])
+
+
+class FakeContainerClient:
+    def __init__(self, names, calls):
+        self.names = names
+        self.calls = calls
+
+    def walk_blobs(self, name_starts_with=None, delimiter="/", results_per_page=None):
+        prefix = name_starts_with or ""
+        items, folders = [], set()
+        for name in self.names:
+            if not name.startswith(prefix):
+                continue
+            rest = name[len(prefix):]
+            if delimiter in rest:
+                folder = prefix + rest.split(delimiter, 1)[0] + delimiter
+                if folder not in folders:
+                    folders.add(folder)
+                    items.append(Test.BlobPrefix(prefix=folder, name=folder))
+            else:
+                items.append(SimpleNamespace(name=name, size=len(name)))
+        return self._paged(items, results_per_page)
+
+    def list_blobs(self, name_starts_with=None, results_per_page=None):
+        items = [SimpleNamespace(name=name, size=len(name)) for name in self.names
+                 if name.startswith(name_starts_with or "")]
+        return self._paged(items, results_per_page)
+
+    def _paged(self, items, page_size):
+        def by_page(continuation_token=None):
+            self.calls.append((page_size, continuation_token))
+            return Pages(items, page_size, continuation_token)
+        return SimpleNamespace(by_page=by_page)
+
+
+class FakeService:
+    account_name = "account"
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.calls = []
+
+    def get_container_client(self, container):
+        return FakeContainerClient(self.names, self.calls)
+
+
+NAMES = ["a/b/one.txt", "a/b/two.txt", "a/three.txt", "c/four.txt", "five.txt", "six.txt"]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = Test.ListingCache(str(tmp_path / "listing.sqlite3"))
+    monkeypatch.setattr(Test, "_listing_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def service():
+    return FakeService(NAMES)
+
+
+def test_listing_folds_folders_and_pages(cache, service):
+    entries, token = Test.list_blobs(service, "c", page_size=3)
+    assert entries == [("a/", True, None), ("c/", True, None), ("five.txt", False, 8)]
+    assert token == "3"
+    entries, token = Test.list_blobs(service, "c", continuation_token=token, page_size=3)
+    assert entries == [("six.txt", False, 7)] and token is None
+
+    entries, _ = Test.list_blobs(service, "c", delimiter=None, page_size=10)
+    assert [name for name, _, _ in entries] == NAMES
+
+
+def test_pages_are_served_from_the_cache(cache, service):
+    first = Test.list_blobs(service, "c", page_size=3)
+    assert Test.list_blobs(service, "c", page_size=3) == first
+    assert len(service.calls) == 1
+    Test.list_blobs(service, "c", page_size=3, refresh=True)
+    assert len(service.calls) == 2
+
+
+def test_page_size_is_part_of_the_key(cache, service):
+    _, token = Test.list_blobs(service, "c", page_size=2)
+    entries, _ = Test.list_blobs(service, "c", continuation_token=token, page_size=3)
+    # A page of 3 starting where a page of 2 ended is not a cached page
+    assert [name for name, _, _ in entries] == ["five.txt", "six.txt"]
+    assert service.calls == [(2, None), (3, token)]
+
+
+def test_pages_expire_after_the_ttl(cache, service, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Test.time, "time", lambda: now[0])
+    Test.list_blobs(service, "c", page_size=3)
+    now[0] += cache.ttl
+    Test.list_blobs(service, "c", page_size=3)
+    assert len(service.calls) == 1
+    now[0] += 1
+    Test.list_blobs(service, "c", page_size=3)
+    assert len(service.calls) == 2
+
+
+def test_changes_drop_the_pages_covering_a_blob(cache, service):
+    for prefix in ("", "a/", "a/b/", "c/"):
+        Test.list_blobs(service, "c", prefix=prefix)
+    Test.list_blobs(service, "other", prefix="a/b/")
+    Test.invalidate_listing("account", "c", "a/b/new.txt")
+    cached = {key[1:3] for key in cache.conn.execute("SELECT account, container, prefix FROM pages")}
+    assert cached == {("c", "c/"), ("other", "a/b/")}
+
+
+def test_subtree_invalidation_drops_listings_below(cache, service):
+    for prefix in ("", "a/", "a/b/", "c/"):
+        Test.list_blobs(service, "c", prefix=prefix)
+    Test.invalidate_listing("account", "c", "a/", subtree=True)
+    assert {row[0] for row in cache.conn.execute("SELECT prefix FROM pages")} == {"c/"}
+
+
+def test_cache_errors_are_reported_not_raised(cache, monkeypatch, capsys):
+    def broken(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "invalidate", broken)
+    Test.invalidate_listing("account", "c", "a.txt")
+    assert "listings may be out of date: database is locked" in capsys.readouterr().out
+
+
+def test_pages_cached_before_page_size_was_keyed_are_dropped(tmp_path):
+    path = str(tmp_path / "listing.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE pages (account TEXT, container TEXT, prefix TEXT, delimiter TEXT, "
+                 "token TEXT, entries TEXT, next_token TEXT, fetched_at REAL)")
+    conn.execute("INSERT INTO pages VALUES ('account', 'c', '', '/', '', '[]', NULL, 0)")
+    conn.commit()
+    conn.close()
+    cache = Test.ListingCache(path)
+    key = ("account", "c", "", "/", 100, "")
+    assert cache.get(key) is None
+    cache.put(key, [("a.txt", False, 1)], None)
+    assert cache.get(key) == ([("a.txt", False, 1)], None)
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import Test
+
+
+class FakeContainerClient:
+    # The async container client calls sync_directory makes, in memory
+    def __init__(self):
+        self.blobs = {}    # name -> (data, metadata, md5)
+        self.uploads = []
+        self.delete_calls = []
+
+    def put(self, name, data, mtime_ns=None):
+        metadata = {"mtime": str(mtime_ns)} if mtime_ns is not None else {}
+        self.blobs[name] = (data, metadata, hashlib.md5(data).digest())
+
+    async def list_blobs(self, name_starts_with=None, include=None):
+        for name in sorted(self.blobs):
+            if name.startswith(name_starts_with or ""):
+                data, metadata, md5 = self.blobs[name]
+                yield SimpleNamespace(
+                    name=name, size=len(data), metadata=metadata,
+                    content_settings=SimpleNamespace(content_md5=bytearray(md5)),
+                )
+
+    async def upload_blob(self, name, data, overwrite=False, metadata=None, content_settings=None,
+                          max_concurrency=None):
+        data = data.read()
+        self.uploads.append(name)
+        self.blobs[name] = (data, metadata or {}, bytes(content_settings.content_md5))
+
+    async def download_blob(self, name, max_concurrency=None):
+        data = self.blobs[name][0]
+
+        async def readinto(f):
+            f.write(data)
+
+        return SimpleNamespace(readinto=readinto)
+
+    async def delete_blobs(self, *names):
+        self.delete_calls.append(names)
+        for name in names:
+            del self.blobs[name]
+
+
+def sync(container, direction, local_dir, **options):
+    return asyncio.run(Test.sync_directory(container, direction, str(local_dir), **options))
+
+
+def write(root, relative, data):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+@pytest.fixture
+def container():
+    return FakeContainerClient()
+
+
+def test_push_uploads_then_skips_unchanged_files(container, tmp_path):
+    write(tmp_path, "a.txt", b"alpha")
+    write(tmp_path, "sub/b.txt", b"beta")
+    write(tmp_path, "sub/c.bin.partial", b"half")
+    summary = sync(container, "push", tmp_path, prefix="backup/")
+    assert summary == {"transferred": 2, "unchanged": 0, "deleted": 0, "failed": 0}
+    assert sorted(container.blobs) == ["backup/a.txt", "backup/sub/b.txt"]
+    assert container.blobs["backup/a.txt"][2] == hashlib.md5(b"alpha").digest()
+
+    summary = sync(container, "push", tmp_path, prefix="backup/")
+    assert summary["transferred"] == 0 and summary["unchanged"] == 2
+    assert len(container.uploads) == 2
+
+
+def test_push_with_delete_removes_extra_blobs_in_batches(container, tmp_path, monkeypatch):
+    monkeypatch.setattr(Test, "DELETE_BATCH_SIZE", 2)
+    write(tmp_path, "keep.txt", b"keep")
+    for i in range(5):
+        container.put(f"old{i}.txt", b"old")
+    container.put("elsewhere/old.txt", b"old")
+    summary = sync(container, "push", tmp_path, delete=True)
+    assert summary["deleted"] == 6
+    assert sorted(container.blobs) == ["keep.txt"]
+    assert [len(names) for names in container.delete_calls] == [2, 2, 2]
+
+
+def test_dry_run_changes_nothing(container, tmp_path):
+    write(tmp_path, "a.txt", b"alpha")
+    container.put("extra.txt", b"extra")
+    summary = sync(container, "push", tmp_path, delete=True, dry_run=True)
+    assert summary == {"transferred": 1, "unchanged": 0, "deleted": 0, "failed": 0}
+    assert sorted(container.blobs) == ["extra.txt"]
+
+
+def test_pull_restores_mtime_and_falls_back_to_md5(container, tmp_path):
+    container.put("docs/a.txt", b"alpha", mtime_ns=1_600_000_000_000_000_000)
+    container.put("docs/b.txt", b"beta")
+    local = tmp_path / "local"
+    summary = sync(container, "pull", local, prefix="docs/")
+    assert summary["transferred"] == 2
+    assert (local / "a.txt").read_bytes() == b"alpha"
+    assert os.stat(local / "a.txt").st_mtime_ns == 1_600_000_000_000_000_000
+    assert not list(local.glob("*.partial"))
+
+    # b.txt has no recorded mtime, so its content decides
+    summary = sync(container, "pull", local, prefix="docs/")
+    assert summary["transferred"] == 0 and summary["unchanged"] == 2
+
+
+def test_pull_with_delete_removes_extra_local_files(container, tmp_path):
+    container.put("a.txt", b"alpha")
+    write(tmp_path, "stale.txt", b"stale")
+    summary = sync(container, "pull", tmp_path, delete=True)
+    assert summary["deleted"] == 1
+    assert sorted(os.listdir(tmp_path)) == ["a.txt"]
+
+
+@pytest.mark.parametrize("name", ["../escaped.txt", "sub/../../escaped.txt"])
+def test_pull_refuses_names_outside_the_directory(container, tmp_path, name):
+    container.put(name, b"evil")
+    local = tmp_path / "local"
+    local.mkdir()
+    summary = sync(container, "pull", local)
+    assert summary["failed"] == 1 and summary["transferred"] == 0
+    assert not (tmp_path / "escaped.txt").exists()
+
+
+def test_pull_refuses_symlinked_folders_leading_outside(container, tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    local = tmp_path / "local"
+    local.mkdir()
+    os.symlink(outside, local / "link")
+    container.put("link/evil.txt", b"evil")
+    summary = sync(container, "pull", local)
+    assert summary["failed"] == 1
+    assert not (outside / "evil.txt").exists()
@@ -0,0 +1,171 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+
+import Test
+
+
+class FakeBlobClient:
+    # Block blob semantics of the service, kept in memory
+    def __init__(self):
+        self.data = None
+        self.etag = None
+        self.uncommitted = {}
+        self.staged = []
+        self.reads = []
+        self.fail_stage_at = None
+        self.fail_read_at = None
+
+    def _commit(self, data):
+        self.data = data
+        self.etag = f'"{len(data)}-{hash(data)}"'
+        self.uncommitted = {}
+
+    def upload_blob(self, data, overwrite=False):
+        self._commit(data.read())
+
+    def get_block_list(self, block_list_type):
+        if self.data is None and not self.uncommitted:
+            raise ResourceNotFoundError("BlobNotFound")
+        return [], [SimpleNamespace(id=block_id, size=len(data)) for block_id, data in self.uncommitted.items()]
+
+    def stage_block(self, block_id, data, length=None):
+        if self.fail_stage_at is not None and len(self.staged) >= self.fail_stage_at:
+            raise ConnectionError("connection reset")
+        self.staged.append(block_id)
+        self.uncommitted[block_id] = data
+
+    def commit_block_list(self, blocks, **conditions):
+        if conditions.get("etag") == "*" and self.data is not None:
+            raise ResourceModifiedError("BlobAlreadyExists")
+        self._commit(b"".join(self.uncommitted[block.id] for block in blocks))
+
+    def get_blob_properties(self):
+        if self.data is None:
+            raise ResourceNotFoundError("BlobNotFound")
+        return SimpleNamespace(name="blob", size=len(self.data), etag=self.etag, last_modified=None)
+
+    def download_blob(self, offset, length, max_concurrency, etag, match_condition):
+        if etag != self.etag:
+            raise ResourceModifiedError("ConditionNotMet")
+        if self.fail_read_at is not None and len(self.reads) >= self.fail_read_at:
+            raise ConnectionError("connection reset")
+        self.reads.append((offset, length))
+        chunk = self.data[offset:offset + length]
+        return SimpleNamespace(readinto=lambda f: f.write(chunk))
+
+
+class FakeService:
+    account_name = "account"
+
+    def __init__(self):
+        self.blobs = {}
+
+    def get_blob_client(self, container, blob):
+        return self.blobs.setdefault((container, blob), FakeBlobClient())
+
+
+@pytest.fixture(autouse=True)
+def listing_cache(tmp_path, monkeypatch):
+    cache = Test.ListingCache(str(tmp_path / "listing.sqlite3"))
+    monkeypatch.setattr(Test, "_listing_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def service():
+    return FakeService()
+
+
+def make_file(tmp_path, size):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def test_small_file_is_uploaded_in_one_request(service, tmp_path):
+    path = make_file(tmp_path, 100)
+    Test.upload_blob(service, "c", path, "small.bin", block_size=1024)
+    blob = service.blobs["c", "small.bin"]
+    assert blob.data == open(path, "rb").read() and blob.staged == []
+
+
+def test_large_file_is_uploaded_in_blocks(service, tmp_path):
+    path = make_file(tmp_path, 10 * 1024 + 5)
+    Test.upload_blob(service, "c", path, "large.bin", max_concurrency=3, block_size=1024)
+    blob = service.blobs["c", "large.bin"]
+    assert blob.data == open(path, "rb").read()
+    assert len(blob.staged) == 11
+
+
+def test_interrupted_upload_resumes_with_staged_blocks(service, tmp_path, capsys):
+    path = make_file(tmp_path, 8 * 1024)
+    blob = service.get_blob_client("c", "large.bin")
+    blob.fail_stage_at = 3
+    Test.upload_blob(service, "c", path, "large.bin", max_concurrency=1, block_size=1024)
+    assert "Failed to upload file" in capsys.readouterr().out
+    assert blob.data is None and len(blob.uncommitted) == 3
+
+    blob.fail_stage_at = None
+    Test.upload_blob(service, "c", path, "large.bin", max_concurrency=1, block_size=1024)
+    assert "3 of 8 blocks were already staged" in capsys.readouterr().out
+    assert len(blob.staged) == 8
+    assert blob.data == open(path, "rb").read()
+
+
+def test_existing_blob_is_kept_without_overwrite(service, tmp_path, capsys):
+    path = make_file(tmp_path, 4 * 1024)
+    blob = service.get_blob_client("c", "large.bin")
+    blob._commit(b"original")
+    Test.upload_blob(service, "c", path, "large.bin", block_size=1024)
+    assert blob.data == b"original"
+    assert "Failed to upload file" in capsys.readouterr().out
+    Test.upload_blob(service, "c", path, "large.bin", block_size=1024, overwrite=True)
+    assert blob.data == open(path, "rb").read()
+
+
+def test_download_is_read_in_segments(service, tmp_path):
+    blob = service.get_blob_client("c", "data.bin")
+    blob._commit(os.urandom(10 * 1024))
+    target = str(tmp_path / "data.bin")
+    Test.download_blob(service, "c", "data.bin", target, max_concurrency=2, block_size=1024)
+    assert open(target, "rb").read() == blob.data
+    assert [offset for offset, _ in blob.reads] == [0, 2048, 4096, 6144, 8192]
+    assert not os.path.exists(target + ".partial")
+    assert not os.path.exists(target + ".partial.json")
+
+
+def test_interrupted_download_resumes(service, tmp_path, capsys):
+    blob = service.get_blob_client("c", "data.bin")
+    blob._commit(os.urandom(10 * 1024))
+    target = str(tmp_path / "data.bin")
+    blob.fail_read_at = 2
+    Test.download_blob(service, "c", "data.bin", target, max_concurrency=2, block_size=1024)
+    assert not os.path.exists(target)
+    with open(target + ".partial.json") as f:
+        assert json.load(f)["offset"] == 4096
+
+    blob.fail_read_at = None
+    Test.download_blob(service, "c", "data.bin", target, max_concurrency=2, block_size=1024)
+    assert "Resuming download of data.bin at byte 4096" in capsys.readouterr().out
+    assert open(target, "rb").read() == blob.data
+    assert [offset for offset, _ in blob.reads] == [0, 2048, 4096, 6144, 8192]
+    assert not os.path.exists(target + ".partial.json")
+
+
+def test_download_starts_over_when_the_blob_changes(service, tmp_path):
+    blob = service.get_blob_client("c", "data.bin")
+    blob._commit(os.urandom(4 * 1024))
+    target = str(tmp_path / "data.bin")
+    blob.fail_read_at = 1
+    Test.download_blob(service, "c", "data.bin", target, max_concurrency=1, block_size=1024)
+
+    blob._commit(os.urandom(4 * 1024))
+    blob.fail_read_at = None
+    blob.reads = []
+    Test.download_blob(service, "c", "data.bin", target, max_concurrency=1, block_size=1024)
+    assert blob.reads[0] == (0, 1024)
+    assert open(target, "rb").read() == blob.data
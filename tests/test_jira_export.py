@@ -0,0 +1,115 @@
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+
+def raw_issue(number):
+    return {
+        "id": str(number),
+        "key": f"KAN-{number}",
+        "fields": {
+            "summary": f"Issue {number}",
+            "status": {"name": "To Do"},
+            "assignee": {"displayName": "Dana"} if number % 2 else None,
+            "priority": {"name": "High"},
+            "issuetype": {"name": "Task"},
+            "created": "2024-01-01T00:00:00.000+0000",
+            "updated": "2024-01-02T00:00:00.000+0000",
+            "components": [{"name": "api"}],
+            "fixVersions": [],
+        },
+    }
+
+
+class FakeJira:
+    # search_issues pages by offset like Jira Server; with deploymentType
+    # "Cloud" only enhanced_search_issues (token pages) is used
+    def __init__(self, count, max_results=None, deployment_type="Server"):
+        self.deploymentType = deployment_type
+        self.issues = [raw_issue(number) for number in range(count, 0, -1)]
+        self.max_results = max_results
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def search_issues(self, jql, startAt=0, maxResults=50, fields=None, json_result=True):
+        assert self.deploymentType != "Cloud"
+        assert json_result and "updated" in fields
+        with self._lock:
+            self.requests.append(startAt)
+        size = min(maxResults, self.max_results or maxResults)
+        return {"issues": self.issues[startAt:startAt + size], "total": len(self.issues), "maxResults": size}
+
+    def enhanced_search_issues(self, jql, nextPageToken=None, maxResults=50, fields=None, json_result=True):
+        start = int(nextPageToken or 0)
+        with self._lock:
+            self.requests.append(nextPageToken)
+        page = {"issues": self.issues[start:start + maxResults]}
+        if start + maxResults < len(self.issues):
+            page["nextPageToken"] = str(start + maxResults)
+        return page
+
+    def project_components(self, key):
+        return [SimpleNamespace(raw={"id": "10", "name": "api"})]
+
+    def project_versions(self, key):
+        return [SimpleNamespace(raw={"id": "20", "name": "1.0", "released": True})]
+
+
+def keys(pages):
+    return [issue["key"] for page in pages for issue in page]
+
+
+@pytest.mark.parametrize("count, page_size", [(0, 5), (5, 5), (23, 5), (23, 100)])
+def test_offset_pages_come_back_in_order(jira_export, count, page_size):
+    jira = FakeJira(count)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pages = list(jira_export.iter_issue_pages(jira, "project = KAN", executor, page_size, workers=2))
+    assert keys(pages) == [f"KAN-{number}" for number in range(count, 0, -1)]
+    assert sorted(jira.requests) == list(range(0, max(count, 1), page_size))
+
+
+def test_offset_pages_follow_the_server_page_size(jira_export):
+    jira = FakeJira(10, max_results=3)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pages = list(jira_export.iter_issue_pages(jira, "project = KAN", executor, 5, workers=2))
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert len(keys(pages)) == 10
+
+
+def test_pages_in_flight_are_bounded(jira_export):
+    jira = FakeJira(200)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pages = jira_export.iter_issue_pages(jira, "project = KAN", executor, 10, workers=2)
+        next(pages)
+        next(pages)
+        # The first page, then at most 2 x workers ahead of the consumer
+        assert len(jira.requests) <= 1 + 2 * 2 + 1
+        assert len(keys([*pages])) == 180
+
+
+def test_cloud_pages_by_token(jira_export):
+    jira = FakeJira(12, deployment_type="Cloud")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pages = list(jira_export.iter_issue_pages(jira, "project = KAN", executor, 5))
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert keys(pages) == [f"KAN-{number}" for number in range(12, 0, -1)]
+    assert jira.requests == [None, "5", "10"]
+
+
+def test_export_writes_issues_then_details(jira_export):
+    jira = FakeJira(7)
+    out = io.StringIO()
+    assert jira_export.export_project(jira, "KAN", out, page_size=3, workers=2) == 7
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record["type"] for record in records] == ["issue"] * 7 + ["component", "version"]
+    assert records[0] == {
+        "type": "issue", "id": "7", "key": "KAN-7", "summary": "Issue 7", "status": "To Do",
+        "assignee": "Dana", "priority": "High", "issuetype": "Task",
+        "created": "2024-01-01T00:00:00.000+0000", "updated": "2024-01-02T00:00:00.000+0000",
+        "components": ["api"], "fixVersions": [],
+    }
+    assert records[-1] == {"type": "version", "id": "20", "name": "1.0", "released": True, "releaseDate": None}
@@ -0,0 +1,144 @@
+import re
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from jiraStore import IssueStore
+
+JQL_SINCE = re.compile(r'updated >= "([^"]+)"')
+START = datetime(2024, 2, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def jira_time(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000%z")
+
+
+class FakeJira:
+    # Jira Server search API over an in-memory project; on_search runs before
+    # every search request, e.g. to edit issues while a sync is paging
+    deploymentType = "Server"
+
+    def __init__(self, count, now=START):
+        self.now = now
+        self.issues = {}
+        self.searches = []
+        self.on_search = None
+        for number in range(1, count + 1):
+            self.edit(f"KAN-{number}", f"Issue {number}", now - timedelta(days=1))
+
+    def edit(self, key, summary, updated=None):
+        self.issues[key] = {
+            "id": key.split("-")[1],
+            "key": key,
+            "fields": {"summary": summary, "updated": jira_time(updated or self.now), "created": jira_time(START)},
+        }
+
+    def server_info(self):
+        return {"serverTime": jira_time(self.now)}
+
+    def myself(self):
+        return {"timeZone": "UTC"}
+
+    def project(self, key):
+        return SimpleNamespace(raw={"id": "1", "key": key})
+
+    def project_components(self, key):
+        return []
+
+    def project_versions(self, key):
+        return []
+
+    def search_issues(self, jql, startAt=0, maxResults=50, fields=None, json_result=True):
+        self.searches.append(jql)
+        if self.on_search is not None:
+            self.on_search(self, startAt)
+        issues = sorted(self.issues.values(), key=lambda issue: int(issue["id"]))
+        match = JQL_SINCE.search(jql)
+        if match:
+            since = datetime.strptime(match.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=timezone.utc)
+            issues = [
+                issue for issue in issues
+                if datetime.strptime(issue["fields"]["updated"], "%Y-%m-%dT%H:%M:%S.%f%z") >= since
+            ]
+        return {"issues": issues[startAt:startAt + maxResults], "total": len(issues), "maxResults": maxResults}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IssueStore(str(tmp_path / "issues.sqlite3"))
+    yield store
+    store.close()
+
+
+def summaries(store):
+    return {record["key"]: record["summary"] for record in store.issues("KAN")}
+
+
+def test_first_sync_fetches_everything_and_sets_the_mark(jira_export, store):
+    jira = FakeJira(25)
+    result = jira_export.sync_project(jira, store, "KAN", page_size=10, workers=2)
+    assert result == {"fetched": 25, "deleted": 0, "full": True, "complete": True}
+    assert len(summaries(store)) == 25
+    assert datetime.fromisoformat(store.high_water("KAN")) == START
+
+
+def test_incremental_sync_fetches_only_changed_issues(jira_export, store):
+    jira = FakeJira(25)
+    jira_export.sync_project(jira, store, "KAN", page_size=10, workers=2)
+    jira.now = START + timedelta(hours=1)
+    jira.edit("KAN-7", "Edited", START + timedelta(minutes=30))
+
+    result = jira_export.sync_project(jira, store, "KAN", page_size=10, workers=2)
+
+    assert result["fetched"] == 1 and not result["full"] and result["complete"]
+    assert summaries(store)["KAN-7"] == "Edited"
+    # The window starts one minute before the previous sync, in the user's zone
+    assert 'updated >= "2024/02/01 09:59"' in jira.searches[-1]
+    assert datetime.fromisoformat(store.high_water("KAN")) == jira.now
+
+
+def test_mark_advances_when_issues_change_during_the_sync(jira_export, store):
+    jira = FakeJira(25)
+    jira_export.sync_project(jira, store, "KAN", page_size=10, workers=1)
+    jira.now = START + timedelta(hours=1)
+    sync_started = jira.now
+
+    def edit_while_paging(jira, start_at):
+        if start_at == 0:
+            jira.now = sync_started + timedelta(seconds=30)
+            jira.edit("KAN-3", "Edited during sync")
+
+    jira.on_search = edit_while_paging
+    jira.edit("KAN-20", "Edited before sync", START + timedelta(minutes=30))
+    result = jira_export.sync_project(jira, store, "KAN", page_size=10, workers=1)
+
+    assert not result["complete"]
+    # Advanced anyway; the issue edited mid-sync is newer than the mark
+    assert datetime.fromisoformat(store.high_water("KAN")) == sync_started
+
+    jira.on_search = None
+    jira.now = sync_started + timedelta(hours=1)
+    result = jira_export.sync_project(jira, store, "KAN", page_size=10, workers=1)
+    assert result["complete"]
+    assert summaries(store)["KAN-3"] == "Edited during sync"
+    assert summaries(store)["KAN-20"] == "Edited before sync"
+    # Only the window since the last mark is fetched again, not the whole project
+    assert result["fetched"] == 1
+
+
+def test_full_sync_removes_deleted_issues_unless_it_shifted(jira_export, store):
+    jira = FakeJira(12)
+    jira_export.sync_project(jira, store, "KAN", page_size=5, workers=2)
+    del jira.issues["KAN-4"]
+
+    jira.on_search = lambda jira, start_at: jira.edit("KAN-1", "Edited during sync", jira.now + timedelta(seconds=1))
+    result = jira_export.sync_project(jira, store, "KAN", full=True, page_size=5, workers=2)
+    assert result["deleted"] == 0 and not result["complete"]
+    assert "KAN-4" in summaries(store)
+
+    jira.on_search = None
+    jira.now += timedelta(hours=1)
+    result = jira_export.sync_project(jira, store, "KAN", full=True, page_size=5, workers=2)
+    assert result["deleted"] == 1 and result["complete"]
+    assert "KAN-4" not in summaries(store)
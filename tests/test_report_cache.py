@@ -0,0 +1,106 @@
+import os
+import shutil
+
+import pytest
+
+import reportCache
+import reportCount
+from reportCache import ReportCache, get_report_cache
+
+
+class Counter:
+    # Stands in for a parser; records which files were actually parsed
+    def __init__(self):
+        self.calls = []
+        self.__name__ = "count_lines"
+
+    def __call__(self, path):
+        self.calls.append(path)
+        with open(path, encoding="utf-8") as f:
+            return {"lines": len(f.read().splitlines())}
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / "report.csv"
+    path.write_text("a\nb\nc\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache" / "cache.sqlite3")
+    monkeypatch.setenv("REPORT_CACHE", path)
+    # Drop the process-wide connection once the test is done
+    monkeypatch.setattr(reportCache, "_cache", None)
+    return path
+
+
+def test_second_parse_is_a_hit(report, tmp_path):
+    cache = ReportCache(str(tmp_path / "cache.sqlite3"))
+    counter = Counter()
+    assert cache.cached(counter, report, 1) == {"lines": 3}
+    assert cache.cached(counter, report, 1) == {"lines": 3}
+    assert counter.calls == [report]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_copied_report_hits_and_changed_report_misses(report, tmp_path):
+    cache = ReportCache(str(tmp_path / "cache.sqlite3"))
+    counter = Counter()
+    cache.cached(counter, report, 1)
+    copy = str(tmp_path / "copy.csv")
+    shutil.copy(report, copy)
+    assert cache.cached(counter, copy, 1) == {"lines": 3}
+    assert counter.calls == [report]
+
+    with open(report, "a", encoding="utf-8") as f:
+        f.write("d\n")
+    assert cache.cached(counter, report, 1) == {"lines": 4}
+    assert counter.calls == [report, report]
+
+
+def test_parser_version_change_invalidates(report, cache_path, monkeypatch):
+    counter = Counter()
+    assert reportCount.cached_count(counter, report) == {"lines": 3}
+    reportCount.cached_count(counter, report)
+    assert len(counter.calls) == 1
+
+    monkeypatch.setattr(reportCount, "PARSER_VERSION", reportCount.PARSER_VERSION + 1)
+    assert reportCount.cached_count(counter, report) == {"lines": 3}
+    assert len(counter.calls) == 2
+    reportCount.cached_count(counter, report)
+    assert len(counter.calls) == 2
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache.sqlite3"), max_bytes=250)
+    counter = Counter()
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"report{i}.csv"
+        path.write_text("x\n" * (i + 1), encoding="utf-8")
+        paths.append(str(path))
+        cache.cached(counter, str(path), 1)
+    stats = cache.stats()
+    assert stats["bytes"] <= 250 and stats["entries"] < 4
+    # The newest result survives eviction
+    cache.cached(counter, paths[-1], 1)
+    assert counter.calls.count(paths[-1]) == 1
+
+
+def test_cache_can_be_turned_off(report, monkeypatch):
+    monkeypatch.setenv("REPORT_CACHE", "off")
+    assert get_report_cache() is None
+    counter = Counter()
+    reportCount.cached_count(counter, report)
+    reportCount.cached_count(counter, report)
+    assert len(counter.calls) == 2
+
+
+def test_cache_follows_the_configured_path(cache_path, tmp_path, monkeypatch):
+    assert get_report_cache().path == cache_path
+    assert os.path.exists(cache_path)
+    other = str(tmp_path / "other.sqlite3")
+    monkeypatch.setenv("REPORT_CACHE", other)
+    assert get_report_cache().path == other
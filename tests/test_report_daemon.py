@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import reportCount
+import reportDaemon
+
+
+def fake_process_report(path):
+    # Runs in the pool's workers; a "poison" report kills its worker the way
+    # the kernel's OOM killer would
+    if "poison" in os.path.basename(path):
+        os._exit(1)
+    return [{"path": path, "type": "CSV", "counts": {"High": 1, "Low": 2}, "error": None, "seconds": 0.0}]
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(reportCount, "process_report", fake_process_report)
+    watcher = reportDaemon.ReportWatcher(str(tmp_path), workers=2, events=io.StringIO(), interval=0)
+    yield watcher
+    watcher.close()
+
+
+def write(root, relative, text="x"):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def poll_until_idle(watcher, timeout=30):
+    # The first poll only records file stats; reports are counted once settled
+    deadline = time.monotonic() + timeout
+    watcher.poll()
+    watcher.poll()
+    while watcher.pending:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"still pending: {sorted(watcher.pending)}")
+        time.sleep(0.05)
+        watcher.poll()
+
+
+def events(watcher):
+    return [json.loads(line) for line in watcher.events.getvalue().splitlines()]
+
+
+def test_reports_are_counted_per_project(watcher, tmp_path):
+    one = write(tmp_path, "alpha/one.csv")
+    write(tmp_path, "alpha/nested/two.csv")
+    write(tmp_path, "top.csv")
+    poll_until_idle(watcher)
+    assert watcher.snapshot_totals() == {
+        "alpha": {"CSV": {"High": 2, "Low": 4}},
+        reportDaemon.ROOT_PROJECT: {"CSV": {"High": 1, "Low": 2}},
+    }
+
+    os.remove(one)
+    watcher.poll()
+    assert watcher.snapshot_totals("alpha") == {"CSV": {"High": 1, "Low": 2}}
+    assert events(watcher)[-1] == {"event": "removed", "path": one, "project": "alpha"}
+
+
+def test_dead_worker_only_fails_its_own_report(watcher, tmp_path):
+    paths = [write(tmp_path, f"alpha/report{i}.csv") for i in range(6)]
+    poison = write(tmp_path, "alpha/poison.csv")
+    poll_until_idle(watcher)
+
+    reports = {result["path"]: result for result in watcher.snapshot_reports()}
+    assert set(reports) == {*paths, poison}
+    assert reports[poison]["error"].startswith("BrokenProcessPool")
+    assert all(reports[path]["error"] is None for path in paths)
+    assert watcher.snapshot_totals("alpha") == {"CSV": {"High": 6, "Low": 12}}
+
+    # The daemon keeps going with a fresh pool
+    later = write(tmp_path, "beta/later.csv")
+    poll_until_idle(watcher)
+    assert {result["path"] for result in watcher.snapshot_reports()} >= {later}
+    assert watcher.health()["pool_restarts"] >= 1
+
+
+def test_totals_are_served_over_http(watcher, tmp_path):
+    write(tmp_path, "alpha/one.csv")
+    poll_until_idle(watcher)
+    server = reportDaemon.make_server(watcher, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/totals/alpha") as response:
+            assert json.load(response) == {"CSV": {"High": 1, "Low": 2}}
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/totals/missing")
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()